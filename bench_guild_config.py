@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+# ============================================================
+# GuildConfigStore at 10k guilds: JSON migration, get, bursts of set,
+# and the final flush().
+#
+# GuildConfigStore is lifted out of bot.py's source so the bot itself
+# never starts. For reference the old path, a full guild_config.json
+# rewrite on every set_guild_channel_id, is timed on the same data.
+#
+#   python bench_guild_config.py --guilds 10000 --burst 1000
+# ============================================================
+
+BOT_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+
+
+def load_store_class(config_path: str):
+    with open(BOT_PY, encoding="utf-8") as f:
+        src = f.read()
+    start = src.index("def _load_legacy_config")
+    end = src.index("GUILD_CONFIG = ", start)
+    ns = {
+        "os": os, "json": json, "time": time, "sqlite3": sqlite3, "threading": threading,
+        "ThreadPoolExecutor": ThreadPoolExecutor, "Optional": Optional, "Dict": Dict, "Any": Any,
+        "CONFIG_PATH": config_path, "logger": logging.getLogger("bench"),
+    }
+    exec(src[start:end], ns)
+    return ns["GuildConfigStore"]
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:10.1f} ms"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--guilds", type=int, default=10_000)
+    ap.add_argument("--gets", type=int, default=100_000)
+    ap.add_argument("--burst", type=int, default=1_000, help="set() calls in one burst")
+    args = ap.parse_args()
+
+    ids = [random.getrandbits(62) for _ in range(args.guilds)]
+    legacy = {str(gid): {"channel_id": random.getrandbits(62)} for gid in ids}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "guild_config.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(legacy, f, indent=2)
+        store_cls = load_store_class(config_path)
+        print(f"{args.guilds} guilds")
+
+        # Long flush delay: the burst is only queued in memory, flush() writes it.
+        store = store_cls(os.path.join(tmp, "guilds.sqlite3"), 3600.0)
+        t = time.perf_counter()
+        store.load()
+        print(f"migrate from JSON    {_ms(time.perf_counter() - t)}")
+
+        lookups = [random.choice(ids) for _ in range(args.gets)]
+        t = time.perf_counter()
+        for gid in lookups:
+            store.get(gid, "channel_id", 0)
+        per = (time.perf_counter() - t) / args.gets
+        print(f"get                  {per * 1e9:10.0f} ns/call ({args.gets} calls)")
+
+        burst = random.sample(ids, min(args.burst, len(ids)))
+        t = time.perf_counter()
+        for gid in burst:
+            store.set(gid, "channel_id", random.getrandbits(62))
+        print(f"set burst            {_ms(time.perf_counter() - t)} ({len(burst)} guilds)")
+
+        t = time.perf_counter()
+        store.flush()
+        print(f"flush()              {_ms(time.perf_counter() - t)} ({store.rows_written} rows)")
+
+        # Before: every set rewrote the whole file on the event loop.
+        t = time.perf_counter()
+        for gid in burst[:20]:
+            legacy[str(gid)]["channel_id"] = random.getrandbits(62)
+            with open(config_path + ".old", "w", encoding="utf-8") as f:
+                json.dump(legacy, f, indent=2)
+        per = (time.perf_counter() - t) / min(20, len(burst))
+        print(f"old set (JSON file)  {_ms(per)}/call, on the event loop")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+from logging.handlers import RotatingFileHandler
+
+# ============================================================
+# Event-loop lag while logging ~1k lines/s: the old synchronous
+# RotatingFileHandler + StreamHandler vs AsyncLogHandler.
+#
+# AsyncLogHandler (and the batched handlers it drives) are lifted out of
+# bot.py's source so the bot itself never starts. A coroutine emits
+# --rate records/s in 10 ms bursts, every --exc-every'th one with a
+# traceback, while a 5 ms ticker measures how late the loop wakes up.
+# Files rotate at 2 MB like the bot's.
+#
+#   python bench_logging.py --rate 1000 --seconds 10
+# ============================================================
+
+BOT_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+TICK = 0.005
+BURST = 0.010
+MAX_BYTES = 2_000_000
+
+
+def load_logging_section(log_format: str) -> dict:
+    with open(BOT_PY, encoding="utf-8") as f:
+        src = f.read()
+    start = src.index("class _DeferredFlush")
+    end = src.index('logger = logging.getLogger("musicbot")', start)
+    ns = {
+        "os": os, "json": json, "time": time, "queue": queue, "threading": threading, "logging": logging,
+        "RotatingFileHandler": RotatingFileHandler, "LOG_FORMAT": log_format,
+        "logger": logging.getLogger("bench"),
+    }
+    exec(src[start:end], ns)
+    return ns
+
+
+def _pct(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(log: logging.Logger, args) -> list:
+    lags: list = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            t = loop.time()
+            await asyncio.sleep(TICK)
+            lags.append((loop.time() - t - TICK) * 1000)
+
+    tick = asyncio.create_task(ticker())
+    per_burst = max(1, int(args.rate * BURST))
+    n = 0
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        for _ in range(per_burst):
+            n += 1
+            if args.exc_every and n % args.exc_every == 0:
+                try:
+                    raise RuntimeError("synthetic failure")
+                except RuntimeError:
+                    log.exception("Failed to play track %s in guild %s", n, 1234)
+            else:
+                log.info("Now playing track %s in guild %s (queue=%s)", n, 1234, n % 50)
+        await asyncio.sleep(BURST)
+    done.set()
+    await tick
+    return lags
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=int, default=1000, help="records per second")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--exc-every", type=int, default=200, help="every Nth record carries a traceback (0 = never)")
+    ap.add_argument("--capacity", type=int, default=10_000, help="AsyncLogHandler buffer (LOG_BUFFER)")
+    ap.add_argument("--format", default="text", choices=("text", "json"))
+    args = ap.parse_args()
+
+    ns = load_logging_section(args.format)
+    fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+    print(f"{args.rate} records/s for {args.seconds:g}s; loop lag in ms over a {TICK * 1000:.0f} ms tick")
+    print(f"{'handler':<8} {'lag p50':>8} {'lag p99':>8} {'lag max':>8} {'written':>8} {'dropped':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("sync", "async"):
+            # The console handler writes to a file too, so the terminal speed doesn't skew the result.
+            console = open(os.path.join(tmp, f"{name}.console"), "w", encoding="utf-8")
+            log = logging.getLogger(f"bench.{name}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            if name == "sync":
+                fh = RotatingFileHandler(os.path.join(tmp, f"{name}.log"), maxBytes=MAX_BYTES, backupCount=3, encoding="utf-8")
+                ch = logging.StreamHandler(console)
+                fh.setFormatter(ns["JsonLineFormatter"]() if args.format == "json" else fmt)
+                ch.setFormatter(fmt)
+                log.addHandler(fh)
+                log.addHandler(ch)
+                handler = None
+            else:
+                fh = ns["_BatchedRotatingFileHandler"](os.path.join(tmp, f"{name}.log"), maxBytes=MAX_BYTES, backupCount=3, encoding="utf-8")
+                ch = ns["_BatchedStreamHandler"](console)
+                fh.setFormatter(ns["JsonLineFormatter"]() if args.format == "json" else fmt)
+                ch.setFormatter(fmt)
+                handler = ns["AsyncLogHandler"]([fh, ch], args.capacity)
+                log.addHandler(handler)
+
+            lags = asyncio.run(run(log, args))
+            if handler is not None:
+                handler.close()  # drain, so "written" is final
+                written, dropped = str(handler.written), str(handler.dropped)
+            else:
+                written, dropped = "-", "-"
+            for h in list(log.handlers):
+                h.close()
+                log.removeHandler(h)
+            fh.close()
+            console.close()
+            print(f"{name:<8} {_pct(lags, 0.5):8.2f} {_pct(lags, 0.99):8.2f} {max(lags, default=0.0):8.2f} {written:>8} {dropped:>8}")
+
+
+if __name__ == "__main__":
+    main()
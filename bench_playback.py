@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import resource
+import subprocess
+
+# ============================================================
+# Streams-per-core benchmark for the playback paths in bot.py.
+#
+# Runs N concurrent FFmpeg processes over the same Opus/WebM input the
+# way make_audio_source() would for each path and reports the FFmpeg CPU
+# spent per second of audio:
+#   pcm          decode to s16le (before: discord.py then re-encodes
+#                every frame in-process, which is not counted here)
+#   opus-encode  decode + libopus encode (volume != 1.0 / non-Opus input)
+#   opus-copy    -c:a copy remux, no decode at all (after)
+#
+#   python bench_playback.py --streams 20 --seconds 60
+# ============================================================
+
+PATHS = {
+    "pcm": ["-f", "s16le", "-ar", "48000", "-ac", "2"],
+    "opus-encode": ["-filter:a", "volume=0.80", "-c:a", "libopus", "-b:a", "128k", "-f", "ogg"],
+    "opus-copy": ["-c:a", "copy", "-f", "ogg"],
+}
+
+
+def make_input(path: str, seconds: int) -> None:
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+         "-ac", "2", "-ar", "48000", "-c:a", "libopus", "-b:a", "128k", path],
+        check=True,
+    )
+
+
+def children_cpu() -> float:
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+def run_path(name: str, src: str, streams: int) -> tuple:
+    # No -re: FFmpeg runs flat out, so wall time isn't meaningful but CPU per audio second is.
+    cmd = ["ffmpeg", "-v", "error", "-ss", "1.500", "-i", src, "-vn", *PATHS[name], "pipe:1"]
+    cpu0, t0 = children_cpu(), time.perf_counter()
+    procs = [subprocess.Popen(cmd, stdout=subprocess.DEVNULL) for _ in range(streams)]
+    for p in procs:
+        if p.wait() != 0:
+            raise SystemExit(f"ffmpeg failed for {name}")
+    return children_cpu() - cpu0, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--streams", type=int, default=10, help="concurrent FFmpeg processes per path")
+    ap.add_argument("--seconds", type=int, default=60, help="length of the synthetic track")
+    args = ap.parse_args()
+    if shutil.which("ffmpeg") is None:
+        sys.exit("ffmpeg not found on PATH")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "input.webm")
+        make_input(src, args.seconds)
+        audio = (args.seconds - 1.5) * args.streams
+        print(f"{args.streams} streams x {args.seconds}s, {os.cpu_count()} cores")
+        print(f"{'path':<12} {'cpu s':>8} {'wall s':>8} {'cpu ms/audio s':>15} {'streams/core':>13}")
+        for name in PATHS:
+            cpu, wall = run_path(name, src, args.streams)
+            per = cpu / audio if audio > 0 else 0.0
+            # A realtime stream needs 1 audio second per wall second.
+            per_core = 1.0 / per if per > 0 else float("inf")
+            print(f"{name:<12} {cpu:8.2f} {wall:8.2f} {per * 1000:15.2f} {per_core:13.0f}")
+
+
+if __name__ == "__main__":
+    main()
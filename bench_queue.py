@@ -0,0 +1,79 @@
+import os
+import re
+import sys
+import random
+import asyncio
+import timeit
+from collections import deque
+from typing import Optional, Tuple, Iterable
+
+# ============================================================
+# Micro-benchmark for PlaylistQueue against the plain deque it replaced.
+#
+# PlaylistQueue is lifted out of bot.py's source so the bot itself
+# (Discord login, yt-dlp, ...) is never started. Each operation is timed
+# with timeit at 10 / 1k / 100k queued tracks and reported in µs per call.
+#
+#   python bench_queue.py [--number N]
+# ============================================================
+
+SIZES = (10, 1_000, 100_000)
+
+
+class _NullGauge:
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+
+def load_queue_class():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py"), encoding="utf-8") as f:
+        src = f.read()
+    start = src.index("class PlaylistQueue")
+    end = re.compile(r"^\S", re.M).search(src, src.index("\n", start) + 1).start()
+    ns = {
+        "asyncio": asyncio, "random": random, "Optional": Optional, "Tuple": Tuple,
+        "Iterable": Iterable, "Track": object, "M_QUEUED_TRACKS": _NullGauge(),
+    }
+    exec(src[start:end], ns)
+    return ns["PlaylistQueue"]
+
+
+def ops(kind: str, n: int):
+    """(name, stmt) pairs; each leaves the length unchanged so repeats are comparable."""
+    mid = n // 2
+    if kind == "deque":
+        return [
+            ("append+pop", lambda q: (q.append(0), q.pop())),
+            ("popleft+appendleft", lambda q: q.appendleft(q.popleft())),
+            ("index mid", lambda q: q[mid]),
+            ("insert+del mid", lambda q: (q.insert(mid, 0), q.__delitem__(mid))),
+            ("first 10", lambda q: [q[i] for i in range(min(10, n))]),
+        ]
+    return [
+        ("append+pop", lambda q: (q.append(0), q.pop())),
+        ("popleft+appendleft", lambda q: q.appendleft(q.popleft())),
+        ("index mid", lambda q: q[mid]),
+        ("insert+del mid", lambda q: (q.insert(mid, 0), q.pop(mid))),
+        ("first 10", lambda q: q.slice(0, 10)),
+    ]
+
+
+def main() -> None:
+    number = int(sys.argv[sys.argv.index("--number") + 1]) if "--number" in sys.argv else 2000
+    PlaylistQueue = load_queue_class()
+    print(f"{'op':<20} {'size':>7} {'deque µs':>10} {'PlaylistQueue µs':>17}")
+    for n in SIZES:
+        items = list(range(n))
+        impls = {"deque": deque(items), "pq": PlaylistQueue(items)}
+        rows = {}
+        for kind, q in impls.items():
+            for name, fn in ops(kind, n):
+                t = min(timeit.repeat(lambda: fn(q), number=number, repeat=3))
+                rows.setdefault(name, {})[kind] = t / number * 1e6
+        for name, r in rows.items():
+            print(f"{name:<20} {n:>7} {r['deque']:>10.2f} {r['pq']:>17.2f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import ast
+import json
+import time
+import timeit
+import asyncio
+import argparse
+from types import SimpleNamespace
+from typing import Optional, Dict, Tuple
+
+import discord
+
+# ============================================================
+# Per-tick Now Playing render cost, before and after the fragment cache.
+#
+# before  what every progress tick did: build the whole embed (24-cell bar
+#         and three fmt_time calls included), a fresh NowPlayingView, and
+#         hash the embed JSON to detect no-op edits
+# after   _render_state() plus one tuple compare for a tick that changes
+#         nothing visible; for a tick that does, nowplaying_embed(state)
+#         from the cached fragments and bar table, and the cached view
+#
+# The current render path and NowPlayingView are lifted out of bot.py's
+# source so the bot itself never starts.
+#
+#   python bench_render.py --number 5000
+# ============================================================
+
+BOT_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+
+MODULE_DEFS = ("fmt_time", "progress_bars", "progress_cell", "progress_bar", "NowPlayingFragments", "NowPlayingView")
+PLAYER_METHODS = (
+    "_elapsed_exact", "_elapsed_seconds", "_remaining_seconds", "_track_fragments", "_render_state",
+    "_progress_state", "nowplaying_embed", "_view_state", "_panel_view",
+)
+
+
+def load_render_path() -> dict:
+    with open(BOT_PY, encoding="utf-8") as f:
+        src = f.read()
+    tree = ast.parse(src)
+    lines = src.splitlines()
+
+    def segment(node) -> str:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        return "\n".join(lines[start - 1:node.end_lineno])
+
+    top = {n.name: n for n in tree.body if isinstance(n, (ast.FunctionDef, ast.ClassDef))}
+    player = top["MusicPlayer"]
+    methods = {n.name: n for n in player.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    code = "from __future__ import annotations\nPROGRESS_WIDTH = 24\n_PROGRESS_BARS = {}\n"
+    code += "\n\n".join(segment(top[name]) for name in MODULE_DEFS)
+    code += "\n\nclass Player:\n" + "\n\n".join(segment(methods[name]) for name in PLAYER_METHODS)
+    ns = {"discord": discord, "time": time, "PANEL_UPDATE_SECONDS": 1.0,
+          "Optional": Optional, "Dict": Dict, "Tuple": Tuple}
+    exec(code, ns)
+    return ns
+
+
+# ---- before: the render path as it was prior to the fragment cache ----
+def old_progress_bar(elapsed: int, total: int, width: int = 24) -> str:
+    if not total or total <= 0:
+        return "▱" * width
+    ratio = min(1.0, max(0.0, elapsed / total))
+    filled = int(ratio * width)
+    return "▰" * filled + "▱" * (width - filled)
+
+
+def old_nowplaying_embed(p, fmt_time) -> discord.Embed:
+    t = p.current
+    title = t.title or "Resolving…"
+    artist = t.artist or "Unknown artist"
+    requester = t.requested_by
+    url = t.webpage_url or ""
+
+    dur = t.duration
+    elapsed = p._elapsed_seconds()
+    remaining = p._remaining_seconds()
+
+    state = "⏸️ Paused" if (p.voice and p.voice.is_paused()) else "▶️ Playing"
+    color = discord.Color.blurple() if state.startswith("▶️") else discord.Color.orange()
+
+    embed = discord.Embed(title="🎶 Music Panel", description=f"**[{title}]({url})**" if url else f"**{title}**", color=color)
+    if getattr(t, "thumbnail", None):
+        embed.set_thumbnail(url=t.thumbnail)
+    embed.add_field(name="Artist", value=artist, inline=True)
+    embed.add_field(name="Requested by", value=requester, inline=True)
+    embed.add_field(name="Status", value=state, inline=True)
+    if dur is not None:
+        bar = old_progress_bar(elapsed, dur, width=24)
+        prog_lines = [f"`{fmt_time(elapsed)} / {fmt_time(dur)}`", f"`{bar}`"]
+        if remaining is not None:
+            prog_lines.append(f"⏳ Remaining: **{fmt_time(remaining)}**")
+        embed.add_field(name="Progress", value="\n".join(prog_lines), inline=False)
+    else:
+        embed.add_field(name="Progress", value="⏳ Remaining: **unknown**", inline=False)
+    qsize = p.queue.qsize()
+    embed.add_field(name="Up next", value=f"{qsize} track(s) in queue" if qsize else "—", inline=True)
+    embed.add_field(name="Volume", value=f"{int(p.volume * 100)}%", inline=True)
+    embed.set_footer(text="Use the buttons below to control playback and manage the queue.")
+    return embed
+
+
+def make_player(ns: dict):
+    p = ns["Player"]()
+    p.current = SimpleNamespace(
+        title="Some Artist - A Reasonably Long Song Title (Official Audio)", artist="Some Artist",
+        requested_by="someone#1234", webpage_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        thumbnail="https://i.ytimg.com/vi/dQw4w9WgXcQ/hqdefault.jpg", duration=215,
+    )
+    p.voice = SimpleNamespace(is_paused=lambda: False, is_playing=lambda: True)
+    p.history = [p.current]
+    p.queue = SimpleNamespace(qsize=lambda: 12)
+    p.volume = 1.0
+    p._started_monotonic = time.monotonic() - 42
+    p._paused_total = 0.0
+    p._paused_at = None
+    p._fragments = None
+    p._fragments_track = None
+    p._view = None
+    p._view_key = None
+    return p
+
+
+async def bench(number: int) -> None:
+    ns = load_render_path()
+    p = make_player(ns)
+    fmt_time = ns["fmt_time"]
+    view_cls = ns["NowPlayingView"]
+
+    def before():
+        embed = old_nowplaying_embed(p, fmt_time)
+        view_cls(p)
+        return hash((json.dumps(embed.to_dict(), sort_keys=True), p._view_state()))
+
+    rendered = p._render_state()
+
+    def after_suppressed():
+        return p._render_state() == rendered
+
+    def after_changed():
+        state = p._render_state()
+        p.nowplaying_embed(state)
+        p._panel_view(state[1])
+
+    print(f"{'path':<22} {'µs/tick':>9}")
+    for name, fn in (("before", before), ("after, no-op tick", after_suppressed), ("after, changed tick", after_changed)):
+        fn()  # warm the caches
+        t = min(timeit.repeat(fn, number=number, repeat=3))
+        print(f"{name:<22} {t / number * 1e6:9.2f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--number", type=int, default=5000, help="ticks per timing")
+    args = ap.parse_args()
+    asyncio.run(bench(args.number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import ast
+import gc
+import json
+import argparse
+import tracemalloc
+
+# ============================================================
+# Memory held by N resolved tracks: full yt-dlp info dicts (what
+# ytdlp_resolve used to return and the player kept alive) vs the
+# ResolvedTrack records extract_trimmed() projects them to.
+#
+# ResolvedTrack, pick_artist and extract_trimmed are lifted out of
+# resolver_worker.py's source, so neither yt-dlp nor the network is
+# needed. Each info dict is a fresh parse of a canned YouTube-shaped
+# template (formats, thumbnails, captions, ...), or of a real one saved
+# with `yt-dlp -J URL > info.json` and passed as --info.
+#
+#   python bench_resolved_memory.py --tracks 1000
+# ============================================================
+
+WORKER_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resolver_worker.py")
+VIDEO_ID = "VIDEOID0000"
+
+
+def load_projection() -> dict:
+    with open(WORKER_PY, encoding="utf-8") as f:
+        src = f.read()
+    tree = ast.parse(src)
+    lines = src.splitlines()
+    wanted = ("ResolvedTrack", "pick_artist", "extract_trimmed")
+    code = "from __future__ import annotations\n" + "\n\n".join(
+        "\n".join(lines[n.lineno - 1:n.end_lineno])
+        for n in tree.body if isinstance(n, (ast.FunctionDef, ast.ClassDef)) and n.name in wanted
+    )
+    ns: dict = {}
+    exec(code, ns)
+    return ns
+
+
+def canned_info() -> dict:
+    """Roughly the shape and size of yt-dlp's info dict for one YouTube video."""
+    def url(kind: str, n: int) -> str:
+        return (f"https://rr{n % 9}---sn-abc.googlevideo.com/videoplayback?expire=1700000000&ei=x&ip=1.2.3.4"
+                f"&id=o-{VIDEO_ID}{kind}{n}&itag={n}&source=youtube&requiressl=yes" + "&sig=" + "A1b2C3d4" * 40)
+
+    headers = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120 Safari/537.36",
+               "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+               "Accept-Language": "en-us,en;q=0.5", "Sec-Fetch-Mode": "navigate"}
+    formats = [{
+        "format_id": str(100 + i), "format_note": f"{144 * (1 + i % 6)}p", "ext": "webm" if i % 2 else "mp4",
+        "acodec": "opus" if i < 4 else "none", "vcodec": "none" if i < 4 else "vp9", "url": url("f", i),
+        "width": 256 * (1 + i % 6), "height": 144 * (1 + i % 6), "fps": 30, "tbr": 100.5 + i, "asr": 48000,
+        "filesize": 1_000_000 + i, "protocol": "https", "http_headers": dict(headers),
+        "downloader_options": {"http_chunk_size": 10485760}, "format": f"{100 + i} - audio/video",
+    } for i in range(25)]
+    thumbnails = [{"url": f"https://i.ytimg.com/vi/{VIDEO_ID}/{i}.jpg?sqp=-oaymwE{i}", "preference": -i,
+                   "id": str(i), "height": 90 + i, "width": 120 + i} for i in range(40)]
+    captions = {lang: [{"ext": ext, "url": url(lang + ext, 0)[:400], "name": lang}
+                       for ext in ("json3", "srv1", "srv2", "srv3", "ttml", "vtt")]
+                for lang in (f"l{i:03d}" for i in range(150))}
+    return {
+        "id": VIDEO_ID, "title": "Some Artist - A Song Title (Official Video)", "formats": formats,
+        "thumbnails": thumbnails, "thumbnail": f"https://i.ytimg.com/vi/{VIDEO_ID}/maxresdefault.jpg",
+        "description": "Lyrics and credits. " * 120, "channel": "Some Artist", "uploader": "Some Artist",
+        "duration": 215, "view_count": 123456789, "tags": [f"tag{i}" for i in range(30)],
+        "automatic_captions": captions, "subtitles": {},
+        "chapters": [{"start_time": i * 20.0, "end_time": i * 20.0 + 20, "title": f"Part {i}"} for i in range(10)],
+        "heatmap": [{"start_time": i * 2.15, "end_time": i * 2.15 + 2.15, "value": i / 100} for i in range(100)],
+        "webpage_url": f"https://www.youtube.com/watch?v={VIDEO_ID}", "url": url("a", 0), "acodec": "opus",
+        "http_headers": dict(headers), "requested_formats": None,
+    }
+
+
+class _CannedYDL:
+    """extract_trimmed() only calls extract_info(); hand it a fresh parse per video."""
+
+    def __init__(self, template: str):
+        self.template = template
+
+    def extract_info(self, video_id: str, download: bool = False) -> dict:
+        return json.loads(self.template.replace(VIDEO_ID, video_id))
+
+
+def measure(build, n: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = [build(i) for i in range(n)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tracks", type=int, default=1000)
+    ap.add_argument("--info", help="a real info dict saved with yt-dlp -J (default: canned template)")
+    args = ap.parse_args()
+
+    if args.info:
+        with open(args.info, encoding="utf-8") as f:
+            info = json.load(f)
+        template = json.dumps(info).replace(str(info.get("id")), VIDEO_ID)
+    else:
+        template = json.dumps(canned_info())
+
+    ns = load_projection()
+    ydl = _CannedYDL(template)
+
+    def video_id(i: int) -> str:
+        return f"v{i:010d}"
+
+    full = measure(lambda i: ydl.extract_info(video_id(i)), args.tracks)
+    trimmed = measure(lambda i: ns["extract_trimmed"](ydl, video_id(i)), args.tracks)
+    print(f"{args.tracks} tracks, template {len(template) / 1024:.0f} KiB of JSON")
+    print(f"{'record':<14} {'total MiB':>10} {'per track KiB':>14}")
+    for name, size in (("info dict", full), ("ResolvedTrack", trimmed)):
+        print(f"{name:<14} {size / 2**20:10.2f} {size / args.tracks / 1024:14.2f}")
+    print(f"ratio {full / max(1, trimmed):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import threading
+import subprocess
+from collections import deque
+from typing import Optional, Deque, Dict, Any
+
+import yt_dlp
+
+from resolver_worker import ResolvedTrack, extract_trimmed
+
+# ============================================================
+# ResolverPool throughput and event-loop lag, thread mode vs process mode.
+#
+# Lifts ResolverPool (and YTDLP_OPTS) out of bot.py's source so the bot
+# itself never starts, then fires N concurrent submit() calls per mode
+# while a 5 ms ticker measures how late the loop wakes up. Extractions
+# are real yt-dlp searches, so this needs network access.
+#
+#   python bench_resolver.py --jobs 40 --workers 4 --guilds 4
+# ============================================================
+
+BOT_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+TICK = 0.005
+
+
+class _NullMetric:
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        pass
+
+    def inc(self, amount: float = 1, labels: tuple = ()) -> None:
+        pass
+
+
+def _section(src: str, start: str, end: str) -> str:
+    i = src.index(start)
+    return src[i:src.index(end, i)]
+
+
+def load_pool_class():
+    with open(BOT_PY, encoding="utf-8") as f:
+        src = f.read()
+    ns = {
+        "__file__": BOT_PY, "os": os, "sys": sys, "json": json, "time": time, "asyncio": asyncio,
+        "threading": threading, "subprocess": subprocess, "deque": deque, "Deque": Deque,
+        "Dict": Dict, "Any": Any, "Optional": Optional, "yt_dlp": yt_dlp,
+        "ResolvedTrack": ResolvedTrack, "extract_trimmed": extract_trimmed,
+        "logger": logging.getLogger("bench"),
+        "M_RESOLVE_WAIT": _NullMetric(), "M_RESOLVE_EXTRACT": _NullMetric(), "M_RESOLVE_JOBS": _NullMetric(),
+    }
+    exec(_section(src, "YTDLP_OPTS = {", "FFMPEG_OPTS = {"), ns)
+    exec(_section(src, "RESOLVER_WORKER_SCRIPT = ", "RESOLVER_POOL = "), ns)
+    return ns["ResolverPool"]
+
+
+def _pct(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run_mode(pool_cls, mode: str, args) -> None:
+    pool = pool_cls(args.workers, mode)
+    lags: list = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            t = loop.time()
+            await asyncio.sleep(TICK)
+            lags.append((loop.time() - t - TICK) * 1000)
+
+    # Warm up every worker (YoutubeDL construction / process spawn) outside the timed run.
+    await asyncio.gather(*(pool.submit(args.query.format(i=i), 0) for i in range(args.workers)), return_exceptions=True)
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(pool.submit(args.query.format(i=i), i % args.guilds) for i in range(args.jobs)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+
+    failed = sum(isinstance(r, BaseException) for r in results)
+    print(f"{mode:<8} {args.jobs / elapsed:8.2f} {elapsed:8.2f} {failed:6d} "
+          f"{_pct(lags, 0.5):8.2f} {_pct(lags, 0.99):8.2f} {max(lags, default=0.0):8.2f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=40, help="concurrent submit() calls per mode")
+    ap.add_argument("--workers", type=int, default=4, help="ResolverPool size")
+    ap.add_argument("--guilds", type=int, default=4, help="spread jobs over this many guild ids")
+    ap.add_argument("--query", default="ytsearch1:lofi hip hop mix {i}", help="query template, {i} = job number")
+    ap.add_argument("--modes", default="thread,process")
+    args = ap.parse_args()
+
+    pool_cls = load_pool_class()
+    print(f"{args.jobs} jobs, {args.workers} workers, {args.guilds} guilds; loop lag in ms over a {TICK * 1000:.0f} ms tick")
+    print(f"{'mode':<8} {'jobs/s':>8} {'wall s':>8} {'failed':>6} {'lag p50':>8} {'lag p99':>8} {'lag max':>8}")
+    for mode in args.modes.split(","):
+        asyncio.run(run_mode(pool_cls, mode.strip(), args))
+
+
+if __name__ == "__main__":
+    main()
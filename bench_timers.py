@@ -0,0 +1,121 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import argparse
+from typing import Optional, Callable
+
+# ============================================================
+# Idle / empty-channel deadlines: TimerWheel vs the old per-guild loops.
+#
+# "old" runs one task per guild that wakes every 5 s to re-check its
+# voice channel, as MusicPlayer did before the wheel. "wheel" arms one
+# idle and one empty-channel deadline per guild on a TimerWheel lifted
+# from bot.py's source, and re-arms a random guild's idle deadline
+# --activity times per second (mark_activity). Both run for --seconds
+# and report loop wakeups and process CPU.
+#
+#   python bench_timers.py --guilds 1000 --seconds 30
+# ============================================================
+
+BOT_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+OLD_POLL = 5.0
+IDLE_SECONDS = 300
+EMPTY_SECONDS = 30
+
+
+def load_wheel_class():
+    with open(BOT_PY, encoding="utf-8") as f:
+        src = f.read()
+    start = src.index("class WheelTimer")
+    end = src.index("TIMERS = TimerWheel()", start)
+    ns = {"time": time, "asyncio": asyncio, "Optional": Optional, "Callable": Callable,
+          "logger": logging.getLogger("bench")}
+    exec(src[start:end], ns)
+    return ns["TimerWheel"]
+
+
+class _Guild:
+    """Just enough player state for the old watcher's checks."""
+
+    def __init__(self):
+        self.members = [object()]  # one listener, so neither condition fires
+        self.last_activity = time.monotonic()
+        self.empty_since: Optional[float] = None
+
+
+async def run_old(args) -> tuple:
+    wakeups = 0
+
+    async def watcher(g: _Guild) -> None:
+        nonlocal wakeups
+        delay = random.uniform(0, OLD_POLL)  # guilds joined at different times
+        while True:
+            await asyncio.sleep(delay)
+            delay = OLD_POLL
+            wakeups += 1
+            now = time.monotonic()
+            if not g.members:
+                g.empty_since = g.empty_since or now
+            else:
+                g.empty_since = None
+            _ = (now - g.last_activity) >= IDLE_SECONDS
+
+    guilds = [_Guild() for _ in range(args.guilds)]
+    tasks = [asyncio.create_task(watcher(g)) for g in guilds]
+    cpu0 = time.process_time()
+    await _drive_activity(args, lambda i: setattr(guilds[i], "last_activity", time.monotonic()))
+    cpu = time.process_time() - cpu0
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return wakeups, cpu
+
+
+async def run_wheel(wheel_cls, args) -> tuple:
+    wheel = wheel_cls()
+    noop = lambda: None
+    idle = [wheel.call_later(IDLE_SECONDS, noop) for _ in range(args.guilds)]
+    empty = [wheel.call_later(EMPTY_SECONDS + args.seconds, noop) for _ in range(args.guilds)]
+
+    def touch(i: int) -> None:
+        wheel.cancel(idle[i])
+        idle[i] = wheel.call_later(IDLE_SECONDS, noop)
+
+    cpu0 = time.process_time()
+    await _drive_activity(args, touch)
+    cpu = time.process_time() - cpu0
+    for t in idle + empty:
+        wheel.cancel(t)
+    return wheel.wakeups, cpu
+
+
+async def _drive_activity(args, touch: Callable[[int], None]) -> None:
+    end = time.monotonic() + args.seconds
+    interval = 1.0 / args.activity if args.activity > 0 else None
+    while time.monotonic() < end:
+        if interval is None:
+            await asyncio.sleep(end - time.monotonic())
+            return
+        touch(random.randrange(args.guilds))
+        await asyncio.sleep(interval)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--guilds", type=int, default=1000)
+    ap.add_argument("--seconds", type=float, default=30.0)
+    ap.add_argument("--activity", type=float, default=0.0, help="mark_activity() calls per second across all guilds")
+    args = ap.parse_args()
+
+    wheel_cls = load_wheel_class()
+    print(f"{args.guilds} idle guilds for {args.seconds:g}s, {args.activity:g} activity/s")
+    print(f"{'impl':<6} {'wakeups':>9} {'wakeups/s':>10} {'cpu ms':>8}")
+    for name, run in (("old", lambda: run_old(args)), ("wheel", lambda: run_wheel(wheel_cls, args))):
+        wakeups, cpu = asyncio.run(run())
+        print(f"{name:<6} {wakeups:9d} {wakeups / args.seconds:10.1f} {cpu * 1000:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
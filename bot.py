@@ -4,12 +4,23 @@ import sys
 import asyncio
 import time
 import random
+import hashlib
+import shlex
+import functools
+import sqlite3
 import json
 import logging
+import threading
+import bisect
+import queue
+import atexit
+import subprocess
 from logging.handlers import RotatingFileHandler
-from dataclasses import dataclass
-from typing import Optional, AsyncGenerator, Deque, Dict, Any, Tuple
-from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, AsyncGenerator, Deque, Dict, Any, Tuple, Iterable, Callable
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 
 import discord
 from discord import app_commands
@@ -17,6 +28,13 @@ from dotenv import load_dotenv
 import yt_dlp
 from aiohttp import web
 
+from resolver_worker import ResolvedTrack, extract_trimmed
+
+try:
+    import audioop  # same module discord.py's PCMVolumeTransformer relies on
+except ImportError:
+    audioop = None
+
 # ============================================================
 # FULL FEATURE BOT + AUTO CONFIG MODE (MULTI-GUILD SAFE)
 #
@@ -63,10 +81,17 @@ CONTROL_PORT = _control["port"]
 CONTROL_KEY = _control["key"]
 
 LOG_PATH = os.getenv("LOG_PATH", "bot.log")
+LOG_FORMAT = (os.getenv("LOG_FORMAT", "text") or "text").strip().lower()  # text | json (JSON lines in LOG_PATH)
+LOG_BUFFER = int(os.getenv("LOG_BUFFER", "10000") or "10000")  # records queued for the writer before dropping
+LOOP_LAG_WARN_MS = int(os.getenv("LOOP_LAG_WARN_MS", "250") or "250")  # log when the loop wakes this late (0 = never)
+SLOW_CALLBACK_MS = int(os.getenv("SLOW_CALLBACK_MS", "50") or "50")  # record callbacks at least this slow (0 = profiler off)
+LOOP_PROFILE_WINDOW = int(os.getenv("LOOP_PROFILE_WINDOW", "600") or "600")  # seconds of slow callbacks kept for /loop
 INSTANCE_NAME = os.getenv("INSTANCE_NAME", "instance-1")
 STARTED_AT = time.time()
 
-CONFIG_PATH = os.getenv("CONFIG_PATH", "guild_config.json")
+CONFIG_PATH = os.getenv("CONFIG_PATH", "guild_config.json")  # legacy; migrated into GUILD_DB_PATH on first start
+GUILD_DB_PATH = os.getenv("GUILD_DB_PATH", "guild_config.sqlite3")
+CONFIG_FLUSH_SECONDS = float(os.getenv("CONFIG_FLUSH_SECONDS", "2") or "2")  # write-behind batching window
 MUSIC_ROLE_NAME = os.getenv("MUSIC_ROLE_NAME", "MusicBot")
 
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
@@ -77,21 +102,464 @@ IDLE_DISCONNECT_SECONDS = int(os.getenv("IDLE_DISCONNECT_SECONDS", "300") or "30
 EMPTY_CHANNEL_DISCONNECT_SECONDS = int(os.getenv("EMPTY_CHANNEL_DISCONNECT_SECONDS", "30") or "30")
 VOLUME_STEP = float(os.getenv("VOLUME_STEP", "0.1") or "0.1")
 
+RESOLVE_CACHE_SIZE = int(os.getenv("RESOLVE_CACHE_SIZE", "512") or "512")
+RESOLVE_CACHE_TTL = int(os.getenv("RESOLVE_CACHE_TTL", "1800") or "1800")  # used when the stream URL has no expire=
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", "1") or "1")  # queued tracks to resolve ahead (0 = off)
+RESOLVER_WORKERS = int(os.getenv("RESOLVER_WORKERS", "4") or "4")
+RESOLVER_MODE = (os.getenv("RESOLVER_MODE", "thread") or "thread").strip().lower()  # thread | process
+PLAYBACK_MODE = (os.getenv("PLAYBACK_MODE", "opus") or "opus").strip().lower()  # opus | pcm
+OPUS_BITRATE = int(os.getenv("OPUS_BITRATE", "128") or "128")  # kbps, when FFmpeg has to encode
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "")  # empty = disk audio cache disabled
+AUDIO_CACHE_MAX_MB = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048") or "2048")
+GAPLESS = (os.getenv("GAPLESS", "1") or "1").strip().lower() not in ("0", "false", "no", "off")
+GAPLESS_PRIME_SECONDS = float(os.getenv("GAPLESS_PRIME_SECONDS", "5") or "5")  # spawn the next FFmpeg this early
+CROSSFADE_SECONDS = float(os.getenv("CROSSFADE_SECONDS", "0") or "0")  # needs PLAYBACK_MODE=pcm (mixing is done on PCM)
+SPOTIFY_FETCH_CONCURRENCY = int(os.getenv("SPOTIFY_FETCH_CONCURRENCY", "4") or "4")  # parallel page requests
+MATCH_DB_PATH = os.getenv("MATCH_DB_PATH", "spotify_matches.sqlite3")  # empty = don't remember matches
+SPOTIFY_CACHE_MAX_COLLECTIONS = int(os.getenv("SPOTIFY_CACHE_MAX_COLLECTIONS", "64") or "64")
+SPOTIFY_CACHE_MAX_TRACKS = int(os.getenv("SPOTIFY_CACHE_MAX_TRACKS", "50000") or "50000")
+SPOTIFY_CACHE_TTL = int(os.getenv("SPOTIFY_CACHE_TTL", "21600") or "21600")  # seconds; playlists are also checked against snapshot_id
+PANEL_UPDATE_SECONDS = float(os.getenv("PANEL_UPDATE_SECONDS", "1.0") or "1.0")  # progress-bar refresh per panel
+PANEL_EDITS_PER_SECOND = float(os.getenv("PANEL_EDITS_PER_SECOND", "20") or "20")  # across all guilds
+PANEL_CHANNEL_EDITS = int(os.getenv("PANEL_CHANNEL_EDITS", "4") or "4")  # per channel, per PANEL_CHANNEL_WINDOW
+PANEL_CHANNEL_WINDOW = float(os.getenv("PANEL_CHANNEL_WINDOW", "5") or "5")  # seconds
+PANEL_EDIT_CONCURRENCY = int(os.getenv("PANEL_EDIT_CONCURRENCY", "8") or "8")  # edits in flight at once
+PANEL_REPOST_AFTER_MESSAGES = int(os.getenv("PANEL_REPOST_AFTER_MESSAGES", "8") or "8")  # 0 = repost on every track
+
 # -------------------- LOGGING --------------------
+class _DeferredFlush:
+    """Handler mixin: per-record flushes become no-ops; the log writer flushes once per batch."""
+
+    def flush(self):
+        pass
+
+    def flush_now(self):
+        super().flush()
+
+class _BatchedRotatingFileHandler(_DeferredFlush, RotatingFileHandler):
+    pass
+
+class _BatchedStreamHandler(_DeferredFlush, logging.StreamHandler):
+    pass
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        obj = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_text:
+            obj["exc"] = record.exc_text
+        return json.dumps(obj, ensure_ascii=False)
+
+class AsyncLogHandler(logging.Handler):
+    """
+    Hands records to a background writer thread so file/console I/O (and rotation)
+    never runs on the event loop. emit() only renders the message and enqueues it;
+    when the bounded buffer is full the record is dropped and counted. The writer
+    drains whatever has queued up, passes it to the real handlers and flushes them
+    once per batch.
+    """
+
+    _STOP = object()
+    FLUSH_INTERVAL = 0.1
+    MAX_BATCH = 1000
+
+    def __init__(self, targets: list, capacity: int):
+        super().__init__()
+        self.targets = targets
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, capacity))
+        self._exc_fmt = logging.Formatter()
+        self.dropped = 0
+        self._dropped_reported = 0
+        self.written = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            # Render now: args may be mutated later, and exc_info would keep whole frames alive.
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = record.exc_text or self._exc_fmt.formatException(record.exc_info)
+                record.exc_info = None
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Collect for up to FLUSH_INTERVAL so a steady trickle is written with one flush.
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            while len(batch) < self.MAX_BATCH and batch[-1] is not self._STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            stop = False
+            if self.dropped != self._dropped_reported:
+                lost = self.dropped - self._dropped_reported
+                self._dropped_reported = self.dropped
+                batch.insert(0, logging.makeLogRecord({
+                    "name": logger.name, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": f"Log buffer full: dropped {lost} record(s)",
+                }))
+            for record in batch:
+                if record is self._STOP:
+                    stop = True
+                    continue
+                for h in self.targets:
+                    if record.levelno >= h.level:
+                        h.handle(record)
+                self.written += 1
+            for h in self.targets:
+                try:
+                    h.flush_now()
+                except Exception:
+                    pass
+            self.batches += 1
+            if stop:
+                return
+
+    def close(self) -> None:
+        """Drain and flush what's queued (logging.shutdown calls this at exit)."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout=5)
+        super().close()
+
+    def stats(self) -> dict:
+        return {
+            "format": LOG_FORMAT,
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+        }
+
 logger = logging.getLogger("musicbot")
 logger.setLevel(logging.INFO)
 _fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
 
-fh = RotatingFileHandler(LOG_PATH, maxBytes=2_000_000, backupCount=3, encoding="utf-8")
-fh.setFormatter(_fmt)
-logger.addHandler(fh)
+fh = _BatchedRotatingFileHandler(LOG_PATH, maxBytes=2_000_000, backupCount=3, encoding="utf-8")
+fh.setFormatter(JsonLineFormatter() if LOG_FORMAT == "json" else _fmt)
 
-ch = logging.StreamHandler()
+ch = _BatchedStreamHandler()
 ch.setFormatter(_fmt)
-logger.addHandler(ch)
+
+LOG_WRITER = AsyncLogHandler([fh, ch], LOG_BUFFER)
+logger.addHandler(LOG_WRITER)
+
+# -------------------- METRICS --------------------
+class Metric:
+    """A counter or gauge, optionally labelled. Updated where things happen; /metrics only reads it."""
+
+    def __init__(self, kind: str, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = {} if labelnames else {(): 0.0}
+        self._lock = threading.Lock()  # resolver threads update some of these
+
+    def inc(self, amount: float = 1.0, labels: tuple = ()) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: tuple = ()) -> None:
+        self.inc(-amount, labels)
+
+    def set(self, value: float, labels: tuple = ()) -> None:
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [("", dict(zip(self.labelnames, k)), v) for k, v in self._values.items()]
+
+class Histogram(Metric):
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...], labelnames: Tuple[str, ...] = ()):
+        super().__init__("histogram", name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {} if labelnames else {(): [[0] * (len(self.buckets) + 1), 0.0]}
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def samples(self) -> list:
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        out = []
+        for labels, counts, total in snapshot:
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for le, n in zip(self.buckets, counts):
+                cumulative += n
+                out.append(("_bucket", {**base, "le": f"{le:g}"}, cumulative))
+            cumulative += counts[-1]
+            out.append(("_bucket", {**base, "le": "+Inf"}, cumulative))
+            out.append(("_sum", base, total))
+            out.append(("_count", base, cumulative))
+        return out
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+def _fmt_value(v: float) -> str:
+    v = float(v)
+    return str(int(v)) if v.is_integer() else repr(v)
+
+class MetricsRegistry:
+    """
+    Prometheus text exposition for /metrics. Metrics are either updated in place
+    (counter/gauge/histogram) or read from a counter some other component already
+    keeps (collect); nothing here walks PLAYERS.
+    """
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list = []
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Metric:
+        m = Metric("counter", name, help_text, labelnames)
+        self._metrics.append(m)
+        return m
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Metric:
+        m = Metric("gauge", name, help_text, labelnames)
+        self._metrics.append(m)
+        return m
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...], labelnames: Tuple[str, ...] = ()) -> Histogram:
+        m = Histogram(name, help_text, buckets, labelnames)
+        self._metrics.append(m)
+        return m
+
+    def collect(self, kind: str, name: str, help_text: str, fn: Callable[[], Any], label: Optional[str] = None) -> None:
+        """fn returns a number, or a {label value: number} dict when `label` is given."""
+        self._collectors.append((kind, name, help_text, fn, label))
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for suffix, labels, value in m.samples():
+                lines.append(f"{m.name}{suffix}{_fmt_labels(labels)} {_fmt_value(value)}")
+        for kind, name, help_text, fn, label in self._collectors:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if label:
+                for lv, v in value.items():
+                    lines.append(f"{name}{_fmt_labels({label: lv})} {_fmt_value(v)}")
+            else:
+                lines.append(f"{name} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+METRICS = MetricsRegistry()
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+M_VOICE_CONNECTIONS = METRICS.gauge("musicbot_voice_connections", "Voice channels the bot is connected to.")
+M_QUEUED_TRACKS = METRICS.gauge("musicbot_queued_tracks", "Tracks waiting in all guild queues.")
+M_FFMPEG_PROCESSES = METRICS.gauge("musicbot_ffmpeg_processes", "FFmpeg processes currently running.", ("purpose",))
+M_FFMPEG_SPAWNED = METRICS.counter("musicbot_ffmpeg_spawned_total", "FFmpeg processes started.", ("purpose",))
+M_RESOLVE_WAIT = METRICS.histogram("musicbot_resolver_wait_seconds", "Time a yt-dlp job waited for a resolver worker.", _LATENCY_BUCKETS)
+M_RESOLVE_EXTRACT = METRICS.histogram("musicbot_resolver_extract_seconds", "yt-dlp extraction time.", _LATENCY_BUCKETS)
+M_RESOLVE_JOBS = METRICS.counter("musicbot_resolver_jobs_total", "yt-dlp extractions by outcome.", ("result",))
+M_PANEL_EDIT_LATENCY = METRICS.histogram("musicbot_panel_edit_latency_seconds", "Panel edit request to completed edit.", _LATENCY_BUCKETS)
+M_LOOP_LAG = METRICS.histogram("musicbot_event_loop_lag_seconds", "How late the event loop woke a sleeping sampler.", (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # peak, where current RSS isn't available
+    except Exception:
+        return None
+
+METRICS.collect("gauge", "process_resident_memory_bytes", "Resident memory size in bytes.", _rss_bytes)
+METRICS.collect("gauge", "process_start_time_seconds", "Start time of the process since unix epoch.", lambda: STARTED_AT)
+METRICS.collect("counter", "musicbot_log_records_dropped_total", "Log records dropped because the log buffer was full.", lambda: LOG_WRITER.dropped)
+
+M_SLOW_CALLBACKS = METRICS.counter("musicbot_slow_callbacks_total", "Event loop callbacks/task steps that ran longer than SLOW_CALLBACK_MS.")
+
+def _percentile(sorted_vals: list, q: float):
+    return sorted_vals[min(len(sorted_vals) - 1, int(len(sorted_vals) * q))] if sorted_vals else None
+
+class LoopLagMonitor:
+    """Sleeps INTERVAL at a time and records how much later than asked the loop woke it up."""
+
+    INTERVAL = 0.5
+
+    def __init__(self, warn_after: float):
+        self.warn_after = warn_after
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.over_threshold = 0
+        self._samples: Deque[float] = deque(maxlen=240)  # last ~2 minutes
+        self._last_warned = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.INTERVAL)
+            lag = max(0.0, loop.time() - started - self.INTERVAL)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._samples.append(lag)
+            M_LOOP_LAG.observe(lag)
+            if self.warn_after > 0 and lag >= self.warn_after:
+                self.over_threshold += 1
+                now = time.monotonic()
+                if now - self._last_warned >= 10:
+                    self._last_warned = now
+                    top = SLOW_CALLBACKS.top(3, since=now - 5)
+                    culprits = ", ".join(f"{e['name']} ({e['max_ms']} ms)" for e in top) or "no slow callback recorded"
+                    logger.warning("Event loop lag %.0f ms; slowest recent callbacks: %s", lag * 1000, culprits)
+
+    def stats(self) -> dict:
+        vals = sorted(self._samples)
+        return {
+            "last_ms": round(self.last_lag * 1000, 1),
+            "p50_ms": round(_percentile(vals, 0.5) * 1000, 1) if vals else None,
+            "p99_ms": round(_percentile(vals, 0.99) * 1000, 1) if vals else None,
+            "max_ms": round(self.max_lag * 1000, 1),
+            "over_threshold": self.over_threshold,
+            "warn_ms": int(self.warn_after * 1000),
+        }
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+class SlowCallbackProfiler:
+    """
+    Times every event loop callback (asyncio.Handle._run, which is also how each
+    task step runs) and keeps the ones over `threshold`, named after the task's
+    coroutine (e.g. MusicPlayer._player_loop) or the plain callback. A rolling
+    window of them answers "what blocked the loop?" via top().
+    """
+
+    def __init__(self, threshold: float, window: float):
+        self.threshold = threshold
+        self.window = window
+        self.total = 0
+        self._events: Deque[Tuple[float, str, float]] = deque(maxlen=2000)  # (monotonic, name, seconds)
+        self._last_logged: Dict[str, float] = {}
+        self._installed = False
+
+    def install(self) -> None:
+        if self._installed or self.threshold <= 0:
+            return
+        self._installed = True
+        original = asyncio.events.Handle._run
+        threshold = self.threshold
+        perf = time.perf_counter
+
+        def _run(handle):
+            started = perf()
+            original(handle)
+            elapsed = perf() - started
+            if elapsed >= threshold:
+                self._record(handle, elapsed)
+
+        asyncio.events.Handle._run = _run
+
+    @staticmethod
+    def describe(handle: asyncio.Handle) -> str:
+        cb = handle._callback
+        owner = getattr(cb, "__self__", None)
+        if isinstance(owner, asyncio.Task):
+            # Task coroutine plus the innermost non-asyncio coroutine it's awaiting, e.g.
+            # "play_cmd > MusicPlayer.add_tracks" when the blocking code was a few awaits deep.
+            coro = owner.get_coro()
+            outer = getattr(coro, "__qualname__", None) or repr(coro)
+            inner, c, depth = None, getattr(coro, "cr_await", None), 0
+            while c is not None and hasattr(c, "cr_code") and depth < 16:
+                if not c.cr_code.co_filename.startswith(_ASYNCIO_DIR):
+                    inner = c.__qualname__
+                c, depth = c.cr_await, depth + 1
+            return f"{outer} > {inner}" if inner else outer
+        return getattr(cb, "__qualname__", None) or repr(cb)
+
+    def _record(self, handle: asyncio.Handle, elapsed: float) -> None:
+        try:
+            name = self.describe(handle)
+        except Exception:
+            name = "<unknown>"
+        now = time.monotonic()
+        self.total += 1
+        self._events.append((now, name, elapsed))
+        M_SLOW_CALLBACKS.inc()
+        if now - self._last_logged.get(name, 0.0) >= 30:
+            self._last_logged[name] = now
+            logger.warning("Slow event loop callback: %s took %.0f ms", name, elapsed * 1000)
+
+    def top(self, n: int = 10, since: Optional[float] = None) -> list:
+        """Slowest callback names in the window, worst first."""
+        since = time.monotonic() - self.window if since is None else since
+        agg: Dict[str, list] = {}
+        for at, name, elapsed in self._events:
+            if at < since:
+                continue
+            a = agg.setdefault(name, [0, 0.0, 0.0])
+            a[0] += 1
+            a[1] += elapsed
+            a[2] = max(a[2], elapsed)
+        ranked = sorted(agg.items(), key=lambda kv: kv[1][2], reverse=True)[:n]
+        return [
+            {"name": name, "count": c, "total_ms": int(total * 1000), "max_ms": int(worst * 1000)}
+            for name, (c, total, worst) in ranked
+        ]
+
+    def recent(self, n: int = 20) -> list:
+        now = time.monotonic()
+        return [
+            {"name": name, "ms": int(elapsed * 1000), "ago_sec": round(now - at, 1)}
+            for at, name, elapsed in list(self._events)[-n:][::-1]
+        ]
+
+LOOP_LAG = LoopLagMonitor(LOOP_LAG_WARN_MS / 1000)
+SLOW_CALLBACKS = SlowCallbackProfiler(SLOW_CALLBACK_MS / 1000, LOOP_PROFILE_WINDOW)
+METRICS.collect("gauge", "musicbot_event_loop_lag_last_seconds", "Most recent event loop lag sample.", lambda: LOOP_LAG.last_lag)
 
 # -------------------- CONFIG (per-guild) --------------------
-def _load_config() -> Dict[str, Any]:
+def _load_legacy_config() -> Dict[str, Any]:
     try:
         with open(CONFIG_PATH, "r", encoding="utf-8") as f:
             obj = json.load(f)
@@ -102,23 +570,156 @@ def _load_config() -> Dict[str, Any]:
         logger.warning("Failed to read %s: %s", CONFIG_PATH, e)
         return {}
 
-def _save_config(cfg: Dict[str, Any]) -> None:
-    try:
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, indent=2)
-    except Exception as e:
-        logger.warning("Failed to write %s: %s", CONFIG_PATH, e)
+class GuildConfigStore:
+    """
+    Per-guild settings. Reads are plain dict lookups (interaction_check hits this for
+    every interaction); writes update memory immediately and are persisted to SQLite
+    by a single background thread, batched: changes made within CONFIG_FLUSH_SECONDS
+    of each other go out as one transaction, and only the guilds that changed are written.
+    """
 
-CONFIG: Dict[str, Any] = _load_config()
+    def __init__(self, path: str, flush_delay: float):
+        self.path = path
+        self.flush_delay = max(0.0, flush_delay)
+        self._guilds: Dict[int, Dict[str, Any]] = {}
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        self._flush_pending = False
+        self._closed = False
+        self._timer: Optional[threading.Timer] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guild-config")
+        self._conn: Optional[sqlite3.Connection] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.last_flush_ms: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS guild_config ("
+            " guild_id INTEGER PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " updated_at INTEGER NOT NULL)"
+        )
+        conn.commit()
+        return conn
+
+    def load(self) -> None:
+        """Load every guild into memory; on first run, import the old guild_config.json."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT guild_id, data FROM guild_config").fetchall()
+            if not rows:
+                legacy = _load_legacy_config()
+                if legacy:
+                    now = int(time.time())
+                    rows = [(int(gid), json.dumps(cfg)) for gid, cfg in legacy.items() if isinstance(cfg, dict)]
+                    with conn:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO guild_config (guild_id, data, updated_at) VALUES (?, ?, ?)",
+                            [(gid, data, now) for gid, data in rows],
+                        )
+                    try:
+                        os.replace(CONFIG_PATH, CONFIG_PATH + ".migrated")
+                    except OSError as e:
+                        logger.warning("Migrated %s but could not rename it: %s", CONFIG_PATH, e)
+                    logger.info("Migrated %s guild config(s) from %s to %s", len(rows), CONFIG_PATH, self.path)
+            for gid, data in rows:
+                try:
+                    self._guilds[int(gid)] = json.loads(data)
+                except ValueError:
+                    logger.warning("Ignoring unreadable config for guild %s", gid)
+        finally:
+            conn.close()
+        logger.info("Guild config: %s guild(s) loaded from %s", len(self._guilds), self.path)
+
+    def get(self, guild_id: int, key: str, default: Any = None) -> Any:
+        g = self._guilds.get(int(guild_id))
+        return default if g is None else g.get(key, default)
+
+    def set(self, guild_id: int, key: str, value: Any) -> None:
+        gid = int(guild_id)
+        with self._lock:
+            self._guilds.setdefault(gid, {})[key] = value
+            self._dirty.add(gid)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        with self._lock:
+            if self._flush_pending or self._closed:
+                return
+            self._flush_pending = True
+            # The delay runs on a timer, not in the writer, so an idle writer never holds up exit.
+            self._timer = threading.Timer(self.flush_delay, self._submit_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _submit_flush(self) -> None:
+        try:
+            self._writer.submit(self._flush)
+        except RuntimeError:
+            pass  # interpreter exiting; flush() writes what's left
+
+    def _flush(self) -> None:
+        with self._lock:
+            self._flush_pending = False
+            batch = [(gid, json.dumps(self._guilds.get(gid, {}))) for gid in self._dirty]
+            self._dirty.clear()
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            if self._conn is None:
+                self._conn = self._connect()
+            now = int(time.time())
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO guild_config (guild_id, data, updated_at) VALUES (?, ?, ?)",
+                    [(gid, data, now) for gid, data in batch],
+                )
+            self.flushes += 1
+            self.rows_written += len(batch)
+            self.last_flush_ms = int((time.monotonic() - started) * 1000)
+        except Exception as e:
+            logger.warning("Failed to save guild config (%s guild(s)): %s", len(batch), e)
+            with self._lock:
+                self._dirty.update(gid for gid, _ in batch)
+            self._schedule_flush()  # retry after another flush delay
+
+    def flush(self) -> None:
+        """
+        Final write at shutdown. concurrent.futures refuses new work once the interpreter
+        is exiting, so stop the writer (letting a queued flush finish) and write what's
+        left on the calling thread.
+        """
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+        self._writer.shutdown(wait=True)
+        self._flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            dirty = len(self._dirty)
+        return {
+            "guilds": len(self._guilds),
+            "pending_writes": dirty,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+GUILD_CONFIG = GuildConfigStore(GUILD_DB_PATH, CONFIG_FLUSH_SECONDS)
+GUILD_CONFIG.load()
+atexit.register(GUILD_CONFIG.flush)
 
 def get_guild_channel_id(guild_id: int) -> int:
-    g = CONFIG.get(str(guild_id), {})
-    return int(g.get("channel_id", 0) or 0)
+    return int(GUILD_CONFIG.get(guild_id, "channel_id", 0) or 0)
 
 def set_guild_channel_id(guild_id: int, channel_id: int) -> None:
-    CONFIG.setdefault(str(guild_id), {})
-    CONFIG[str(guild_id)]["channel_id"] = int(channel_id)
-    _save_config(CONFIG)
+    GUILD_CONFIG.set(guild_id, "channel_id", int(channel_id))
 
 # -------------------- YTDLP / FFMPEG --------------------
 YTDLP_OPTS = {
@@ -133,7 +734,6 @@ FFMPEG_OPTS = {
     "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
     "options": "-vn",
 }
-ytdlp = yt_dlp.YoutubeDL(YTDLP_OPTS)
 
 # -------------------- SPOTIFY (OPTIONAL) --------------------
 SPOTIFY_ENABLED = False
@@ -155,6 +755,133 @@ except Exception:
 SPOTIFY_TRACK_RE = re.compile(r"open\.spotify\.com/track/([A-Za-z0-9]+)")
 SPOTIFY_PLAYLIST_RE = re.compile(r"open\.spotify\.com/playlist/([A-Za-z0-9]+)")
 SPOTIFY_ALBUM_RE = re.compile(r"open\.spotify\.com/album/([A-Za-z0-9]+)")
+SPOTIFY_PAGE_SIZE = 50
+
+# spotipy is blocking; its HTTP calls run here so they never stall the event loop.
+SPOTIFY_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, SPOTIFY_FETCH_CONCURRENCY), thread_name_prefix="spotify")
+
+async def _spotify_call(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(SPOTIFY_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+async def _spotify_pages(fetch: Callable[[int], dict]) -> AsyncGenerator[list, None]:
+    """
+    Yield the `items` of each page in playlist order. The first page reveals `total`; the
+    rest are fetched through a sliding window of SPOTIFY_FETCH_CONCURRENCY requests per
+    import, so one huge playlist can't queue every offset ahead of other guilds' imports.
+    """
+    first = await _spotify_call(fetch, 0)
+    items = first.get("items", [])
+    if not items:
+        return
+    yield items
+    if first.get("next") is None:
+        return
+
+    total = int(first.get("total") or 0)
+    offsets = iter(range(SPOTIFY_PAGE_SIZE, total, SPOTIFY_PAGE_SIZE))
+    window: Deque[asyncio.Future] = deque()
+
+    def refill() -> None:
+        while len(window) < max(1, SPOTIFY_FETCH_CONCURRENCY):
+            off = next(offsets, None)
+            if off is None:
+                return
+            window.append(asyncio.ensure_future(_spotify_call(fetch, off)))
+
+    refill()
+    try:
+        while window:
+            items = (await window.popleft()).get("items", [])
+            if not items:
+                break
+            refill()
+            yield items
+    finally:
+        # Consumer stopped early (e.g. /playnext only wants the first track) or failed.
+        for fut in window:
+            fut.cancel()
+            fut.add_done_callback(_retrieve_exception)
+
+def _retrieve_exception(fut: "asyncio.Future") -> None:
+    """Mark an abandoned future's exception as seen so asyncio doesn't log it."""
+    if not fut.cancelled():
+        fut.exception()
+
+# (name, artists, spotify id) for one track, as kept by SpotifyCollectionCache
+SpotifyMeta = Tuple[str, str, Optional[str]]
+
+class SpotifyCollectionCache:
+    """
+    Expanded Spotify playlists/albums, so a playlist that gets queued over and over is
+    served locally. Playlist entries are only valid for the snapshot_id they were fetched
+    at; every entry also expires after SPOTIFY_CACHE_TTL. LRU-bounded by collection count
+    and total tracks.
+    """
+
+    def __init__(self, max_collections: int, max_tracks: int, ttl: int):
+        self.max_collections = max(1, max_collections)
+        self.max_tracks = max(1, max_tracks)
+        self.ttl = ttl
+        # (kind, id) -> (snapshot_id, fetched_at, pages)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[str], float, list]]" = OrderedDict()
+        self._tracks = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(pages: list) -> int:
+        return sum(len(p) for p in pages)
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        _, _, pages = self._entries.pop(key)
+        self._tracks -= self._size(pages)
+
+    def get(self, key: Tuple[str, str], snapshot_id: Optional[str] = None) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        snap, fetched_at, pages = entry
+        if time.time() - fetched_at > self.ttl or (snapshot_id is not None and snap != snapshot_id):
+            self._drop(key)
+            self.stale += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return pages
+
+    def put(self, key: Tuple[str, str], snapshot_id: Optional[str], pages: list) -> None:
+        size = self._size(pages)
+        if size == 0 or size > self.max_tracks:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (snapshot_id, time.time(), pages)
+        self._tracks += size
+        while len(self._entries) > self.max_collections or self._tracks > self.max_tracks:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "collections": len(self._entries),
+            "tracks": self._tracks,
+            "max_collections": self.max_collections,
+            "max_tracks": self.max_tracks,
+            "ttl_sec": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+SPOTIFY_CACHE = SpotifyCollectionCache(SPOTIFY_CACHE_MAX_COLLECTIONS, SPOTIFY_CACHE_MAX_TRACKS, SPOTIFY_CACHE_TTL)
 
 # -------------------- HELPERS --------------------
 @dataclass
@@ -166,6 +893,9 @@ class Track:
     webpage_url: Optional[str] = None
     duration: Optional[int] = None  # seconds
     thumbnail: Optional[str] = None  # image URL (when available)
+    spotify_id: Optional[str] = None  # set for tracks imported from Spotify
+    trace: Optional["PlayTrace"] = field(default=None, compare=False, repr=False)  # /play phase timings
+    match_hit: Optional[bool] = field(default=None, compare=False, repr=False)  # first resolve used the match index
 
 def fmt_time(seconds: Optional[int]) -> str:
     if seconds is None:
@@ -177,51 +907,990 @@ def fmt_time(seconds: Optional[int]) -> str:
         return f"{h}:{m:02d}:{s:02d}"
     return f"{m}:{s:02d}"
 
-def progress_bar(elapsed: int, total: int, width: int = 24) -> str:
+PROGRESS_WIDTH = 24
+_PROGRESS_BARS: Dict[int, Tuple[str, ...]] = {}
+
+def progress_bars(width: int = PROGRESS_WIDTH) -> Tuple[str, ...]:
+    """Every fill level of a `width`-cell bar, indexed by filled cells."""
+    bars = _PROGRESS_BARS.get(width)
+    if bars is None:
+        bars = _PROGRESS_BARS[width] = tuple("▰" * filled + "▱" * (width - filled) for filled in range(width + 1))
+    return bars
+
+def progress_cell(elapsed: float, total: Optional[float], width: int = PROGRESS_WIDTH) -> int:
     if not total or total <= 0:
-        return "▱" * width
-    ratio = min(1.0, max(0.0, elapsed / total))
-    filled = int(ratio * width)
-    return "▰" * filled + "▱" * (width - filled)
+        return 0
+    return int(min(1.0, max(0.0, elapsed / total)) * width)
 
-async def ytdlp_resolve(query_or_url: str) -> dict:
-    loop = asyncio.get_running_loop()
+def progress_bar(elapsed: float, total: Optional[float], width: int = PROGRESS_WIDTH) -> str:
+    return progress_bars(width)[progress_cell(elapsed, total, width)]
+
+class NowPlayingFragments:
+    """The per-track parts of the Now Playing embed, built once per track (and again only if its metadata changes)."""
+
+    __slots__ = ("key", "description", "thumbnail", "artist", "requester", "duration", "duration_text")
+
+    def __init__(self, t: "Track"):
+        self.key = (t.title, t.artist, t.requested_by, t.webpage_url, t.thumbnail, t.duration)
+        title = t.title or "Resolving…"
+        self.description = f"**[{title}]({t.webpage_url})**" if t.webpage_url else f"**{title}**"
+        self.thumbnail = t.thumbnail
+        self.artist = t.artist or "Unknown artist"
+        self.requester = t.requested_by
+        self.duration = t.duration
+        self.duration_text = fmt_time(t.duration) if t.duration is not None else None
+
+    def matches(self, t: "Track") -> bool:
+        return self.key == (t.title, t.artist, t.requested_by, t.webpage_url, t.thumbnail, t.duration)
+
+# -------------------- /play TRACING --------------------
+M_PLAY_PHASE = METRICS.histogram("musicbot_play_phase_seconds", "Duration of each /play phase.", _LATENCY_BUCKETS, ("phase",))
+M_PLAY_TOTAL = METRICS.histogram("musicbot_play_to_first_frame_seconds", "/play interaction to first audio frame.", _LATENCY_BUCKETS)
+
+class PlayTrace:
+    """
+    Phase timings of one /play, from the interaction to the first audio frame. It rides
+    along on the Track; each step calls mark(phase), which records the time since the
+    previous mark, so the phases add up to the total.
+    """
+
+    __slots__ = ("guild_id", "query", "wall_time", "started_at", "phases", "_last", "done", "error")
+
+    def __init__(self, guild_id: int, query: str):
+        self.guild_id = guild_id
+        self.query = query
+        self.wall_time = time.time()
+        self.started_at = self._last = time.monotonic()
+        self.phases: list[Tuple[str, float]] = []
+        self.done = False
+        self.error: Optional[str] = None
+
+    def mark(self, phase: str, at: Optional[float] = None) -> None:
+        if self.done:
+            return
+        at = time.monotonic() if at is None else at
+        self.phases.append((phase, max(0.0, at - self._last)))
+        self._last = max(self._last, at)
+
+    def total(self) -> float:
+        return self._last - self.started_at
+
+    def to_dict(self) -> dict:
+        return {
+            "guild_id": str(self.guild_id),
+            "query": self.query[:200],
+            "at": int(self.wall_time),
+            "total_ms": int(self.total() * 1000),
+            "phases_ms": {name: int(secs * 1000) for name, secs in self.phases},
+            "error": self.error,
+        }
+
+class PlayTracer:
+    """Finished /play traces: per-phase histograms (also in /metrics) and the recent slowest."""
+
+    def __init__(self, keep: int = 500):
+        self._recent: Deque[PlayTrace] = deque(maxlen=keep)
+        self.finished = 0
+        self.failed = 0
+
+    def finish(self, trace: Optional[PlayTrace], error: Optional[str] = None) -> None:
+        if trace is None or trace.done:
+            return
+        trace.done = True
+        trace.error = error
+        if error:
+            self.failed += 1
+        else:
+            self.finished += 1
+            for name, secs in trace.phases:
+                M_PLAY_PHASE.observe(secs, labels=(name,))
+            M_PLAY_TOTAL.observe(trace.total())
+        self._recent.append(trace)
+
+    def summary(self, slowest: int = 10) -> dict:
+        traces = list(self._recent)
+        by_phase: Dict[str, list] = {}
+        for tr in traces:
+            if tr.error:
+                continue
+            for name, secs in tr.phases:
+                by_phase.setdefault(name, []).append(secs)
+        phases = {}
+        for name, vals in by_phase.items():
+            vals.sort()
+            phases[name] = {
+                "count": len(vals),
+                "p50_ms": int(_percentile(vals, 0.5) * 1000),
+                "p95_ms": int(_percentile(vals, 0.95) * 1000),
+                "max_ms": int(vals[-1] * 1000),
+            }
+        worst = sorted(traces, key=lambda tr: tr.total(), reverse=True)[:slowest]
+        return {
+            "finished": self.finished,
+            "failed": self.failed,
+            "window": len(traces),
+            "phases": phases,
+            "slowest": [tr.to_dict() for tr in worst],
+        }
 
-    def extract():
-        info = ytdlp.extract_info(query_or_url, download=False)
-        if "entries" in info:
-            info = info["entries"][0]
+TRACES = PlayTracer()
+
+# -------------------- RESOLVER CACHE --------------------
+YOUTUBE_ID_RE = re.compile(r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([A-Za-z0-9_-]{11})")
+
+def normalize_query(query_or_url: str) -> str:
+    """Cache key for a query: YouTube URLs collapse to their video id, searches to lowercased words."""
+    q = query_or_url.strip()
+    m = YOUTUBE_ID_RE.search(q)
+    if m:
+        return f"yt:{m.group(1)}"
+    if q.startswith(("http://", "https://")):
+        return "url:" + q.split("#", 1)[0]
+    return "q:" + " ".join(q.lower().split())
+
+def _stream_expiry(stream_url: str) -> float:
+    """Wall-clock time after which the signed stream URL should no longer be used."""
+    fallback = time.time() + RESOLVE_CACHE_TTL
+    try:
+        expire = parse_qs(urlparse(stream_url).query).get("expire")
+        if expire:
+            # Leave a margin so a cached URL doesn't expire mid-track.
+            return min(fallback, float(expire[0]) - 600)
+    except Exception:
+        pass
+    return fallback
+
+class ResolveCache:
+    """LRU cache of ResolvedTrack records, expiring with the signed stream URL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, ResolvedTrack]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[ResolvedTrack]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, info = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
         return info
 
-    return await loop.run_in_executor(None, extract)
+    def put(self, keys: Iterable[str], info: ResolvedTrack) -> None:
+        expires_at = _stream_expiry(info.stream_url or "")
+        for key in keys:
+            self._entries[key] = (expires_at, info)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+RESOLVE_CACHE = ResolveCache(RESOLVE_CACHE_SIZE)
+METRICS.collect("counter", "musicbot_resolver_cache_lookups_total", "Resolver cache lookups by result.",
+                lambda: {"hit": RESOLVE_CACHE.hits, "miss": RESOLVE_CACHE.misses}, label="result")
+_RESOLVE_INFLIGHT: Dict[str, asyncio.Task] = {}
+
+# -------------------- RESOLVER POOL --------------------
+RESOLVER_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resolver_worker.py")
+
+class _ThreadExtractor:
+    """Extracts in the calling pool thread with a YoutubeDL owned by that thread."""
+
+    def __init__(self):
+        self.ydl = yt_dlp.YoutubeDL(YTDLP_OPTS)
+
+    def extract(self, query_or_url: str) -> ResolvedTrack:
+        return extract_trimmed(self.ydl, query_or_url)
+
+class _ProcessExtractor:
+    """
+    Extracts in a long-lived resolver_worker.py process (warm YoutubeDL, own GIL).
+    The process is restarted if it dies.
+    """
+
+    def __init__(self):
+        self.proc: Optional[subprocess.Popen] = None
+        self._next_id = 0
+        self.restarts = 0
+
+    def _spawn(self) -> subprocess.Popen:
+        proc = subprocess.Popen(
+            [sys.executable, RESOLVER_WORKER_SCRIPT, json.dumps(YTDLP_OPTS)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        hello = proc.stdout.readline()
+        if not hello:
+            proc.kill()
+            raise RuntimeError("resolver worker failed to start")
+        return proc
+
+    def extract(self, query_or_url: str) -> ResolvedTrack:
+        if self.proc is None or self.proc.poll() is not None:
+            if self.proc is not None:
+                self.restarts += 1
+                logger.warning("Resolver worker exited (code %s); restarting", self.proc.returncode)
+            self.proc = self._spawn()
+
+        self._next_id += 1
+        try:
+            self.proc.stdin.write(json.dumps({"id": self._next_id, "query": query_or_url}) + "\n")
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+        except (BrokenPipeError, OSError) as e:
+            self.proc.kill()
+            raise RuntimeError(f"resolver worker crashed: {e}")
+        if not line:
+            self.proc.kill()
+            raise RuntimeError("resolver worker crashed")
+
+        resp = json.loads(line)
+        if not resp.get("ok"):
+            raise RuntimeError(resp.get("error") or "extraction failed")
+        return ResolvedTrack.from_dict(resp["info"])
+
+class _ResolveJob:
+    __slots__ = ("loop", "future", "query", "guild_id", "enqueued_at")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future, query: str, guild_id: int):
+        self.loop = loop
+        self.future = future
+        self.query = query
+        self.guild_id = guild_id
+        self.enqueued_at = time.monotonic()
+
+def _settle(fut: asyncio.Future, result: Any, error: Optional[BaseException]) -> None:
+    if fut.cancelled():
+        return
+    if error is not None:
+        fut.set_exception(error)
+    else:
+        fut.set_result(result)
+
+class ResolverPool:
+    """
+    Dedicated yt-dlp extraction threads, kept off the loop's default executor. Each
+    thread owns a YoutubeDL (thread mode) or drives one worker process (process mode).
+    Pending jobs are queued per guild and served round-robin, so a guild importing a
+    huge playlist can't starve another guild's /play.
+    """
+
+    def __init__(self, workers: int, mode: str = "thread"):
+        self.size = max(1, workers)
+        self.mode = "process" if mode == "process" else "thread"
+        self._cond = threading.Condition()
+        self._pending: Dict[int, Deque[_ResolveJob]] = {}
+        self._rotation: Deque[int] = deque()
+        self._threads: list[threading.Thread] = []
+        self.busy = 0
+        self.completed = 0
+        self.failed = 0
+        self._wait_ms: Deque[int] = deque(maxlen=200)
+        self._run_ms: Deque[int] = deque(maxlen=200)
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        for i in range(self.size):
+            t = threading.Thread(target=self._worker, name=f"resolver-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, query_or_url: str, guild_id: int = 0) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        job = _ResolveJob(loop, loop.create_future(), query_or_url, int(guild_id))
+        with self._cond:
+            self._ensure_started()
+            q = self._pending.get(job.guild_id)
+            if q is None:
+                q = self._pending[job.guild_id] = deque()
+                self._rotation.append(job.guild_id)
+            q.append(job)
+            self._cond.notify()
+        return job.future
+
+    def _next_job(self) -> _ResolveJob:
+        with self._cond:
+            while not self._rotation:
+                self._cond.wait()
+            gid = self._rotation.popleft()
+            q = self._pending[gid]
+            job = q.popleft()
+            if q:
+                self._rotation.append(gid)
+            else:
+                del self._pending[gid]
+            self.busy += 1
+            return job
+
+    def _worker(self) -> None:
+        extractor = _ProcessExtractor() if self.mode == "process" else _ThreadExtractor()
+        while True:
+            job = self._next_job()
+            started = time.monotonic()
+            result, error = None, None
+            try:
+                if not job.future.cancelled():
+                    result = extractor.extract(job.query)
+            except Exception as e:
+                error = e
+            finished = time.monotonic()
+            with self._cond:
+                self.busy -= 1
+                self.completed += 1
+                if error is not None:
+                    self.failed += 1
+                self._wait_ms.append(int((started - job.enqueued_at) * 1000))
+                self._run_ms.append(int((finished - started) * 1000))
+            M_RESOLVE_WAIT.observe(started - job.enqueued_at)
+            M_RESOLVE_EXTRACT.observe(finished - started)
+            M_RESOLVE_JOBS.inc(labels=("error" if error is not None else "ok",))
+            try:
+                job.loop.call_soon_threadsafe(_settle, job.future, result, error)
+            except RuntimeError:
+                pass  # loop already closed (shutdown)
+
+    def depth(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._pending.values())
+
+    def stats(self) -> dict:
+        with self._cond:
+            per_guild = {str(gid): len(q) for gid, q in self._pending.items()}
+            wait = list(self._wait_ms)
+            run = list(self._run_ms)
+            busy, completed, failed = self.busy, self.completed, self.failed
+        return {
+            "mode": self.mode,
+            "workers": self.size,
+            "busy": busy,
+            "queue_depth": sum(per_guild.values()),
+            "queue_depth_by_guild": per_guild,
+            "completed": completed,
+            "failed": failed,
+            "wait_ms_avg": int(sum(wait) / len(wait)) if wait else None,
+            "wait_ms_max": max(wait) if wait else None,
+            "extract_ms_avg": int(sum(run) / len(run)) if run else None,
+        }
+
+RESOLVER_POOL = ResolverPool(RESOLVER_WORKERS, RESOLVER_MODE)
+METRICS.collect("gauge", "musicbot_resolver_queue_depth", "yt-dlp jobs waiting for a worker.", RESOLVER_POOL.depth)
+METRICS.collect("gauge", "musicbot_resolver_busy_workers", "Resolver workers currently extracting.", lambda: RESOLVER_POOL.busy)
+
+async def _extract_and_cache(key: str, query_or_url: str, guild_id: int) -> ResolvedTrack:
+    info = await RESOLVER_POOL.submit(query_or_url, guild_id)
+    keys = {key}
+    if info.webpage_url:
+        keys.add(normalize_query(info.webpage_url))
+    RESOLVE_CACHE.put(keys, info)
+    return info
+
+def _resolve_done(key: str, task: asyncio.Task) -> None:
+    _RESOLVE_INFLIGHT.pop(key, None)
+    if not task.cancelled():
+        task.exception()  # mark retrieved; every waiter re-raises it itself
+
+async def ytdlp_resolve(query_or_url: str, guild_id: int = 0) -> ResolvedTrack:
+    """
+    Resolve a query/URL to a ResolvedTrack (title, artist, duration, thumbnail,
+    webpage_url, stream_url). Served from RESOLVE_CACHE when possible; concurrent lookups
+    for the same key share one extraction, which keeps running even if a caller is cancelled.
+    """
+    key = normalize_query(query_or_url)
+    cached = RESOLVE_CACHE.get(key)
+    if cached is not None:
+        RESOLVE_CACHE.hits += 1
+        return cached
+
+    task = _RESOLVE_INFLIGHT.get(key)
+    if task is None:
+        RESOLVE_CACHE.misses += 1
+        task = asyncio.create_task(_extract_and_cache(key, query_or_url, guild_id))
+        _RESOLVE_INFLIGHT[key] = task
+        task.add_done_callback(lambda t: _resolve_done(key, t))
+    else:
+        RESOLVE_CACHE.hits += 1
+    return await asyncio.shield(task)
+
+# -------------------- DISK AUDIO CACHE --------------------
+class AudioDiskCache:
+    """
+    Size-bounded LRU cache of transcoded Opus files, keyed by video id.
+    Files are named by a hash of the id; writes go to a .part file and are renamed into place.
+    Recency survives restarts through file mtimes.
+    """
+
+    SUFFIX = ".opus"
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # file name -> size, oldest first
+        self._total = 0
+        self._storing: set[str] = set()
+        self._store_lock: Optional[asyncio.Semaphore] = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.store_failures = 0
+        self.evictions = 0
+
+    def _name(self, video_id: str) -> str:
+        return hashlib.sha1(video_id.encode("utf-8")).hexdigest() + self.SUFFIX
+
+    def load(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.root):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".part"):
+                try:
+                    os.remove(entry.path)  # interrupted write from a previous run
+                except OSError:
+                    pass
+            elif entry.name.endswith(self.SUFFIX):
+                st = entry.stat()
+                found.append((st.st_mtime, entry.name, st.st_size))
+        for _, name, size in sorted(found):
+            self._index[name] = size
+            self._total += size
+        self._evict()
+        logger.info("Audio cache: %s file(s), %.1f MB in %s", len(self._index), self._total / 1e6, self.root)
+
+    def lookup(self, video_id: Optional[str], count: bool = True) -> Optional[str]:
+        """Path of the cached file for video_id, or None."""
+        if not video_id:
+            return None
+        name = self._name(video_id)
+        if name not in self._index:
+            if count:
+                self.misses += 1
+            return None
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            self._total -= self._index.pop(name)
+            if count:
+                self.misses += 1
+            return None
+        self._index.move_to_end(name)
+        if count:
+            self.hits += 1
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+    def schedule_store(self, info: ResolvedTrack) -> None:
+        """Transcode a fully played track into the cache in the background."""
+        if not info.id or not info.stream_url:
+            return
+        name = self._name(info.id)
+        if name in self._index or name in self._storing:
+            return
+        self._storing.add(name)
+        asyncio.create_task(self._store(name, info.stream_url, info.acodec))
+
+    async def _store(self, name: str, stream_url: str, acodec: Optional[str]) -> None:
+        if self._store_lock is None:
+            self._store_lock = asyncio.Semaphore(1)  # one transcode at a time
+        final = os.path.join(self.root, name)
+        tmp = final + ".part"
+        codec = ["-c:a", "copy"] if (acodec or "").startswith("opus") else ["-c:a", "libopus", "-ar", "48000", "-b:a", f"{OPUS_BITRATE}k"]
+        args = [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+            *shlex.split(FFMPEG_OPTS["before_options"]),
+            "-i", stream_url, "-vn", "-map_metadata", "-1", *codec, "-f", "opus", tmp,
+        ]
+        try:
+            async with self._store_lock:
+                proc = await asyncio.create_subprocess_exec(*args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                M_FFMPEG_SPAWNED.inc(labels=("cache",))
+                M_FFMPEG_PROCESSES.inc(labels=("cache",))
+                try:
+                    rc = await proc.wait()
+                finally:
+                    M_FFMPEG_PROCESSES.dec(labels=("cache",))
+            if rc != 0:
+                raise RuntimeError(f"ffmpeg exited with {rc}")
+            os.replace(tmp, final)
+            size = os.path.getsize(final)
+            self._index[name] = size
+            self._total += size
+            self.stores += 1
+            self._evict()
+        except Exception as e:
+            self.store_failures += 1
+            logger.warning("Audio cache store failed: %s", e)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        finally:
+            self._storing.discard(name)
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and self._index:
+            name, size = self._index.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "files": len(self._index),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "store_failures": self.store_failures,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+AUDIO_CACHE: Optional[AudioDiskCache] = None
+if AUDIO_CACHE_DIR:
+    try:
+        AUDIO_CACHE = AudioDiskCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB * 1024 * 1024)
+        AUDIO_CACHE.load()
+    except Exception as e:
+        logger.error("Audio cache disabled: %s", e)
+        AUDIO_CACHE = None
+
+def playback_path(info: ResolvedTrack, volume: float, local: bool = False) -> str:
+    """
+    How a track will be fed to Discord:
+    - "opus-copy":   source is already Opus and volume is 100%, FFmpeg only remuxes
+    - "opus-encode": FFmpeg encodes Opus (and applies volume as a filter)
+    - "pcm":         FFmpeg decodes to PCM, Python scales volume and libopus encodes in-process
+    Disk cache hits (local=True) are always Opus.
+    """
+    if PLAYBACK_MODE == "pcm":
+        return "pcm"
+    if abs(volume - 1.0) < 0.005 and (local or (info.acodec or "").startswith("opus")):
+        return "opus-copy"
+    return "opus-encode"
+
+class _CountedFFmpeg:
+    """Mixin for discord.py's FFmpeg sources: keeps M_FFMPEG_PROCESSES in step with spawn/cleanup."""
+
+    _counted = False
+
+    def _spawn_process(self, args, **kwargs):
+        proc = super()._spawn_process(args, **kwargs)
+        self._counted = True
+        M_FFMPEG_SPAWNED.inc(labels=("playback",))
+        M_FFMPEG_PROCESSES.inc(labels=("playback",))
+        return proc
 
-def _pick_artist_from_info(info: dict) -> Optional[str]:
-    for key in ("artist", "creator", "uploader", "channel"):
-        val = info.get(key)
-        if isinstance(val, str) and val.strip():
-            return val.strip()
+    def cleanup(self) -> None:
+        try:
+            super().cleanup()
+        finally:
+            if self._counted:
+                self._counted = False
+                M_FFMPEG_PROCESSES.dec(labels=("playback",))
+
+class CountedFFmpegPCMAudio(_CountedFFmpeg, discord.FFmpegPCMAudio):
+    pass
+
+class CountedFFmpegOpusAudio(_CountedFFmpeg, discord.FFmpegOpusAudio):
+    pass
+
+def make_audio_source(info: ResolvedTrack, volume: float, start_at: float = 0, local_path: Optional[str] = None) -> discord.AudioSource:
+    volume = max(0.0, min(volume, 2.0))
+    if local_path:
+        source, before = local_path, ""
+    else:
+        source, before = info.stream_url, FFMPEG_OPTS["before_options"]
+    if start_at > 0:
+        before = f"-ss {start_at:.3f} {before}"
+    path = playback_path(info, volume, local=bool(local_path))
+
+    if path == "pcm":
+        src = CountedFFmpegPCMAudio(source, before_options=before, options=FFMPEG_OPTS["options"])
+        return discord.PCMVolumeTransformer(src, volume=volume)
+
+    options = FFMPEG_OPTS["options"]
+    if path == "opus-encode" and abs(volume - 1.0) >= 0.005:
+        options += f" -filter:a volume={volume:.2f}"
+    return CountedFFmpegOpusAudio(
+        source,
+        codec="opus" if path == "opus-copy" else None,  # discord.py maps "opus" to -c:a copy
+        bitrate=OPUS_BITRATE,
+        before_options=before,
+        options=options,
+    )
+
+def resolved_from_disk(track: Track) -> Optional[ResolvedTrack]:
+    """Play a YouTube URL straight from the disk cache, skipping extraction entirely."""
+    if AUDIO_CACHE is None or track.duration is None:
+        return None
+    key = normalize_query(track.query)
+    if not key.startswith("yt:"):
+        return None
+    video_id = key[3:]
+    if AUDIO_CACHE.lookup(video_id, count=False) is None:
+        return None
+    return ResolvedTrack(
+        id=video_id,
+        title=track.title,
+        artist=track.artist,
+        duration=track.duration,
+        thumbnail=track.thumbnail,
+        webpage_url=track.webpage_url,
+        acodec="opus",
+    )
+
+# -------------------- GAPLESS TRANSITIONS --------------------
+FRAMES_PER_SECOND = 50  # discord.py reads 20 ms frames
+
+def _find_volume_transformer(src: Optional[discord.AudioSource]) -> Optional[discord.PCMVolumeTransformer]:
+    while src is not None:
+        if isinstance(src, discord.PCMVolumeTransformer):
+            return src
+        src = getattr(src, "inner", None)
     return None
 
-def make_audio_source(stream_url: str, volume: float) -> discord.PCMVolumeTransformer:
-    src = discord.FFmpegPCMAudio(stream_url, **FFMPEG_OPTS)
-    return discord.PCMVolumeTransformer(src, volume=max(0.0, min(volume, 2.0)))
+class PrimedSource(discord.AudioSource):
+    """A source whose first frame has already been read, i.e. FFmpeg is spawned, connected and probed."""
+
+    def __init__(self, inner: discord.AudioSource):
+        self.inner = inner
+        self._first: Optional[bytes] = None
+
+    def prime(self) -> bool:
+        # Blocks until FFmpeg produces audio; run it off the loop.
+        self._first = self.inner.read()
+        return bool(self._first)
+
+    def skip(self, frames: int) -> None:
+        """Discard `frames` 20 ms frames, e.g. the audio that played while priming. Blocks."""
+        for _ in range(frames):
+            if not self.read():
+                break
+
+    def read(self) -> bytes:
+        if self._first is not None:
+            data, self._first = self._first, None
+            return data
+        return self.inner.read()
+
+    def is_opus(self) -> bool:
+        return self.inner.is_opus()
+
+    def cleanup(self) -> None:
+        self.inner.cleanup()
+
+def _cleanup_built_source(fut: "asyncio.Future") -> None:
+    """Done-callback for an off-loop source build whose awaiter went away."""
+    if fut.cancelled() or fut.exception() is not None:
+        return
+    source = fut.result()
+    if source is not None:
+        source.cleanup()
+
+def _cleanup_when_done(fut: "asyncio.Future", source: discord.AudioSource) -> None:
+    """Clean `source` up once the off-loop call `fut`, which is still reading from it, returns."""
+    def done(f: "asyncio.Future") -> None:
+        if not f.cancelled():
+            f.exception()  # mark retrieved
+        source.cleanup()
+    fut.add_done_callback(done)
+
+class NextUp:
+    __slots__ = ("source", "track", "info", "local_path", "frames_read")
+
+    def __init__(self, source: PrimedSource, track: Track, info: ResolvedTrack, local_path: Optional[str]):
+        self.source = source
+        self.track = track
+        self.info = info
+        self.local_path = local_path
+        self.frames_read = 0  # frames already played during a crossfade
+
+class TransitionSource(discord.AudioSource):
+    """
+    The source handed to VoiceClient.play(). It plays the current track and, once the
+    player has attached a primed NextUp, switches to it on the very next 20 ms frame
+    (optionally crossfading over the last CROSSFADE_SECONDS). read() runs in discord.py's
+    audio thread; the player only touches it through the lock-protected methods.
+
+    on_event(kind, payload) is called from the audio thread:
+      ("first_frame", (boundary_at, first_frame_at))  first audio of a track
+      ("handover", (NextUp, started_at))              next track took over without a gap
+    """
+
+    def __init__(self, source: discord.AudioSource, duration: Optional[int], boundary_at: Optional[float],
+                 on_event: Callable[[str, Any], None]):
+        self._lock = threading.Lock()
+        self.inner = source
+        self._next: Optional[NextUp] = None
+        self._duration = duration
+        self._boundary_at = boundary_at
+        self._frames = 0
+        self._on_event = on_event
+
+    def has_next(self) -> bool:
+        return self._next is not None
+
+    def next_track(self) -> Optional[Track]:
+        nxt = self._next
+        return nxt.track if nxt else None
+
+    def set_next(self, nxt: NextUp) -> None:
+        with self._lock:
+            old, self._next = self._next, nxt
+        if old is not None:
+            old.source.cleanup()
+
+    def clear_next(self) -> None:
+        with self._lock:
+            old, self._next = self._next, None
+        if old is not None:
+            old.source.cleanup()
+
+    def replace_current(self, source: discord.AudioSource) -> discord.AudioSource:
+        with self._lock:
+            old, self.inner = self.inner, source
+        return old
+
+    def _crossfade(self, data: bytes, nxt: NextUp, cur: discord.AudioSource) -> bytes:
+        fade_frames = int(CROSSFADE_SECONDS * FRAMES_PER_SECOND)
+        if fade_frames <= 0 or audioop is None or not self._duration:
+            return data
+        if cur.is_opus() or nxt.source.is_opus():
+            return data
+        fade_start = self._duration * FRAMES_PER_SECOND - fade_frames
+        if self._frames < fade_start:
+            return data
+        other = nxt.source.read()
+        if not other:
+            return data
+        nxt.frames_read += 1
+        if len(other) != len(data):
+            other = other[:len(data)].ljust(len(data), b"\x00")
+        p = min(1.0, (self._frames - fade_start) / fade_frames)
+        return audioop.add(audioop.mul(data, 2, 1.0 - p), audioop.mul(other, 2, p), 2)
+
+    def read(self) -> bytes:
+        with self._lock:
+            cur, nxt = self.inner, self._next
+        data = cur.read()
+        if data and nxt is not None:
+            data = self._crossfade(data, nxt, cur)
+
+        if not data and nxt is not None:
+            now = time.monotonic()
+            with self._lock:
+                if self._next is not nxt:
+                    return b""
+                self._next = None
+                self.inner = nxt.source
+                self._duration = nxt.info.duration
+                self._boundary_at = now
+                self._frames = 0
+            try:
+                cur.cleanup()
+            except Exception:
+                pass
+            self._on_event("handover", (nxt, now - nxt.frames_read / FRAMES_PER_SECOND))
+            data = nxt.source.read()
+
+        if data:
+            if self._frames == 0:
+                self._on_event("first_frame", (self._boundary_at, time.monotonic()))
+            self._frames += 1
+        return data
+
+    def is_opus(self) -> bool:
+        return self.inner.is_opus()
+
+    def cleanup(self) -> None:
+        self.clear_next()
+        try:
+            self.inner.cleanup()
+        except Exception:
+            pass
 
-async def resolve_title_for_queue_display(query_or_url: str) -> Tuple[str, Optional[str], Optional[str], Optional[int]]:
+# -------------------- SPOTIFY -> YOUTUBE MATCH INDEX --------------------
+class SpotifyMatchIndex:
+    """
+    Remembers which YouTube video a Spotify track was matched to, so later plays
+    (in any guild, across restarts) extract that video directly instead of running
+    a ytsearch. Backed by SQLite; the whole table is loaded into memory at startup and
+    writes go through a single background thread that owns the connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._matches: Dict[str, str] = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="match-index")
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.invalidated = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS spotify_matches ("
+            " spotify_id TEXT PRIMARY KEY,"
+            " video_id TEXT NOT NULL,"
+            " matched_at INTEGER NOT NULL)"
+        )
+        conn.commit()
+        return conn
+
+    def load(self) -> None:
+        """Warm the in-memory map from disk (called once at startup)."""
+        conn = self._connect()
+        try:
+            self._matches = dict(conn.execute("SELECT spotify_id, video_id FROM spotify_matches"))
+        finally:
+            conn.close()
+        logger.info("Spotify match index: %s match(es) loaded from %s", len(self._matches), self.path)
+
+    def lookup(self, spotify_id: str) -> Optional[str]:
+        return self._matches.get(spotify_id)
+
+    def count(self, hit: bool) -> None:
+        """Hit/miss accounting, once per played track (lookups also happen for prefetch and priming)."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def forget(self, spotify_id: str) -> None:
+        """Drop a match whose video no longer resolves (removed, private, region-blocked)."""
+        if self._matches.pop(spotify_id, None) is None:
+            return
+        self.invalidated += 1
+        self._writer.submit(self._delete, spotify_id)
+
+    def _delete(self, spotify_id: str) -> None:
+        try:
+            if self._conn is None:
+                self._conn = self._connect()
+            self._conn.execute("DELETE FROM spotify_matches WHERE spotify_id = ?", (spotify_id,))
+            self._conn.commit()
+        except Exception as e:
+            logger.warning("Failed to drop Spotify match %s: %s", spotify_id, e)
+
+    def record(self, spotify_id: str, video_id: str) -> None:
+        if self._matches.get(spotify_id) == video_id:
+            return
+        self._matches[spotify_id] = video_id
+        self._writer.submit(self._write, spotify_id, video_id)
+
+    def _write(self, spotify_id: str, video_id: str) -> None:
+        try:
+            if self._conn is None:
+                self._conn = self._connect()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO spotify_matches (spotify_id, video_id, matched_at) VALUES (?, ?, ?)",
+                (spotify_id, video_id, int(time.time())),
+            )
+            self._conn.commit()
+            self.writes += 1
+        except Exception as e:
+            logger.warning("Failed to save Spotify match %s -> %s: %s", spotify_id, video_id, e)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "entries": len(self._matches),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "invalidated": self.invalidated,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+MATCH_INDEX: Optional[SpotifyMatchIndex] = None
+if MATCH_DB_PATH:
+    try:
+        MATCH_INDEX = SpotifyMatchIndex(MATCH_DB_PATH)
+        MATCH_INDEX.load()
+    except Exception as e:
+        logger.error("Spotify match index disabled: %s", e)
+        MATCH_INDEX = None
+
+async def resolve_track(track: Track, guild_id: int = 0) -> ResolvedTrack:
+    """Resolve a queued Track for playback; Spotify tracks matched before skip the search."""
+    if track.spotify_id and MATCH_INDEX is not None:
+        vid = MATCH_INDEX.lookup(track.spotify_id)
+        if vid:
+            try:
+                info = await ytdlp_resolve(f"https://www.youtube.com/watch?v={vid}", guild_id)
+                if track.match_hit is None:
+                    track.match_hit = True
+                return info
+            except Exception as e:
+                logger.info("Remembered match %s -> %s no longer resolves (%s); searching again", track.spotify_id, vid, e)
+                MATCH_INDEX.forget(track.spotify_id)
+
+    info = await ytdlp_resolve(track.query, guild_id)
+    if track.spotify_id and MATCH_INDEX is not None:
+        if track.match_hit is None:
+            track.match_hit = False
+        if info.id:
+            MATCH_INDEX.record(track.spotify_id, info.id)
+    return info
+
+async def resolve_title_for_queue_display(query_or_url: str, guild_id: int = 0) -> Tuple[str, Optional[str], Optional[str], Optional[int]]:
     """
     Resolve now so /play can show the REAL track title instantly.
     Returns (title, artist, webpage_url, duration).
     """
-    info = await ytdlp_resolve(query_or_url)
-    title = info.get("title") or "Unknown title"
-    artist = _pick_artist_from_info(info)
-    url = info.get("webpage_url") or query_or_url
-    duration = info.get("duration")
-    return title, artist, url, duration
+    info = await ytdlp_resolve(query_or_url, guild_id)
+    title = info.title or "Unknown title"
+    url = info.webpage_url or query_or_url
+    return title, info.artist, url, info.duration
 
-async def spotify_track_objects(url: str, requested_by: str) -> AsyncGenerator[Track, None]:
+def _spotify_meta(obj: Optional[dict]) -> Optional[SpotifyMeta]:
+    if not obj:
+        return None
+    name = obj.get("name") or "Unknown"
+    artists = ", ".join(a["name"] for a in obj.get("artists", [])) or "Unknown artist"
+    return name, artists, obj.get("id")
+
+def _track_from_meta(meta: SpotifyMeta, requested_by: str) -> Track:
+    name, artists, spotify_id = meta
+    return Track(query=f"{artists} - {name} audio", requested_by=requested_by, title=name, artist=artists, spotify_id=spotify_id)
+
+async def spotify_track_pages(url: str, requested_by: str) -> AsyncGenerator[list, None]:
     """
-    Yields Track objects with title/artist filled from Spotify metadata,
-    while query is a YouTube-search string that yt-dlp can resolve/play.
+    Yields lists of Track objects (one per Spotify page) with title/artist filled from
+    Spotify metadata, while query is a YouTube-search string that yt-dlp can resolve/play.
     """
     if not SPOTIFY_ENABLED or sp is None:
         raise app_commands.AppCommandError(
@@ -231,54 +1900,47 @@ async def spotify_track_objects(url: str, requested_by: str) -> AsyncGenerator[T
     m = SPOTIFY_TRACK_RE.search(url)
     if m:
         tid = m.group(1)
-        t = sp.track(tid)
-        artists = ", ".join(a["name"] for a in t["artists"])
-        name = t["name"]
-        yield Track(query=f"{artists} - {name} audio", requested_by=requested_by, title=name, artist=artists)
+        t = await _spotify_call(sp.track, tid)
+        yield [_track_from_meta(_spotify_meta(t), requested_by)]
         return
 
     m = SPOTIFY_ALBUM_RE.search(url)
     if m:
         aid = m.group(1)
-        limit = 50
-        offset = 0
-        while True:
-            page = sp.album_tracks(aid, limit=limit, offset=offset)
-            items = page.get("items", [])
-            if not items:
-                break
-            for item in items:
-                name = item.get("name") or "Unknown"
-                artists = ", ".join(a["name"] for a in item.get("artists", [])) or "Unknown artist"
-                yield Track(query=f"{artists} - {name} audio", requested_by=requested_by, title=name, artist=artists)
-            if page.get("next") is None:
-                break
-            offset += limit
-        return
-
-    m = SPOTIFY_PLAYLIST_RE.search(url)
-    if m:
+        key = ("album", aid)
+        snapshot_id = None  # albums don't change; TTL only
+        fetch = lambda offset: sp.album_tracks(aid, limit=SPOTIFY_PAGE_SIZE, offset=offset)
+        unwrap = lambda item: item
+    else:
+        m = SPOTIFY_PLAYLIST_RE.search(url)
+        if not m:
+            raise app_commands.AppCommandError("That doesn't look like a Spotify track/album/playlist link.")
         pid = m.group(1)
-        limit = 50
-        offset = 0
-        while True:
-            page = sp.playlist_items(pid, limit=limit, offset=offset, additional_types=("track",))
-            items = page.get("items", [])
-            if not items:
-                break
-            for it in items:
-                tr = it.get("track")
-                if not tr:
-                    continue
-                artists = ", ".join(a["name"] for a in tr.get("artists", [])) or "Unknown artist"
-                name = tr.get("name") or "Unknown"
-                yield Track(query=f"{artists} - {name} audio", requested_by=requested_by, title=name, artist=artists)
-            if page.get("next") is None:
-                break
-            offset += limit
+        key = ("playlist", pid)
+        # One tiny request tells us whether a cached expansion is still current.
+        snapshot_id = (await _spotify_call(sp.playlist, pid, fields="snapshot_id")).get("snapshot_id")
+        fetch = lambda offset: sp.playlist_items(pid, limit=SPOTIFY_PAGE_SIZE, offset=offset, additional_types=("track",))
+        unwrap = lambda item: item.get("track")
+
+    cached = SPOTIFY_CACHE.get(key, snapshot_id)
+    if cached is not None:
+        for metas in cached:
+            yield [_track_from_meta(meta, requested_by) for meta in metas]
         return
 
-    raise app_commands.AppCommandError("That doesn't look like a Spotify track/album/playlist link.")
+    pages: list = []
+    async for items in _spotify_pages(fetch):
+        metas = [meta for meta in (_spotify_meta(unwrap(it)) for it in items) if meta is not None]
+        pages.append(metas)
+        yield [_track_from_meta(meta, requested_by) for meta in metas]
+    # Only reached when the whole collection was consumed.
+    SPOTIFY_CACHE.put(key, snapshot_id, pages)
+
+async def spotify_track_objects(url: str, requested_by: str) -> AsyncGenerator[Track, None]:
+    """Track-at-a-time view of spotify_track_pages."""
+    async for page in spotify_track_pages(url, requested_by):
+        for t in page:
+            yield t
 
 # -------------------- AUTO-CONFIG HELPERS --------------------
 def _music_role_permissions() -> discord.Permissions:
@@ -295,73 +1957,697 @@ def _music_role_permissions() -> discord.Permissions:
     p.use_external_emojis = True
     return p
 
-async def ensure_music_role_and_permissions(guild: discord.Guild, text_channel: discord.TextChannel, me: discord.Member) -> str:
-    notes = []
-    can_manage_roles = me.guild_permissions.manage_roles
-    can_manage_channels = me.guild_permissions.manage_channels
+async def ensure_music_role_and_permissions(guild: discord.Guild, text_channel: discord.TextChannel, me: discord.Member) -> str:
+    notes = []
+    can_manage_roles = me.guild_permissions.manage_roles
+    can_manage_channels = me.guild_permissions.manage_channels
+
+    role = discord.utils.get(guild.roles, name=MUSIC_ROLE_NAME)
+
+    if not can_manage_roles:
+        notes.append("❌ Missing **Manage Roles** — can't create/assign role automatically.")
+    else:
+        if role is None:
+            try:
+                role = await guild.create_role(
+                    name=MUSIC_ROLE_NAME,
+                    permissions=_music_role_permissions(),
+                    reason="Auto-config for music bot",
+                )
+                notes.append(f"✅ Created role **{MUSIC_ROLE_NAME}**.")
+            except Exception as e:
+                notes.append(f"❌ Failed to create role: `{e}`")
+                role = None
+        else:
+            try:
+                desired = _music_role_permissions()
+                merged = discord.Permissions(role.permissions.value | desired.value)
+                if merged.value != role.permissions.value:
+                    await role.edit(permissions=merged, reason="Auto-config (merge perms)")
+                notes.append(f"✅ Found role **{MUSIC_ROLE_NAME}**.")
+            except Exception as e:
+                notes.append(f"⚠️ Couldn't update role perms: `{e}`")
+
+        if role is not None:
+            try:
+                if role not in me.roles:
+                    await me.add_roles(role, reason="Auto-config for music bot")
+                    notes.append("✅ Assigned role to the bot.")
+            except Exception as e:
+                notes.append(f"❌ Failed to assign role: `{e}`")
+
+    if not can_manage_channels:
+        notes.append("❌ Missing **Manage Channels** — can't set channel overwrites automatically.")
+    else:
+        try:
+            if role is not None:
+                ow = text_channel.overwrites_for(role)
+                ow.view_channel = True
+                ow.send_messages = True
+                ow.embed_links = True
+                ow.read_message_history = True
+                ow.add_reactions = True
+                ow.send_messages_in_threads = True
+                await text_channel.set_permissions(role, overwrite=ow, reason="Auto-config for music bot")
+                notes.append(f"✅ Set permissions for **{MUSIC_ROLE_NAME}** in {text_channel.mention}.")
+            else:
+                ow = text_channel.overwrites_for(me)
+                ow.view_channel = True
+                ow.send_messages = True
+                ow.embed_links = True
+                ow.read_message_history = True
+                ow.add_reactions = True
+                ow.send_messages_in_threads = True
+                await text_channel.set_permissions(me, overwrite=ow, reason="Auto-config (member overwrite)")
+                notes.append(f"✅ Set permissions for the bot in {text_channel.mention}.")
+        except Exception as e:
+            notes.append(f"❌ Failed to set channel overwrites: `{e}`")
+
+    return "\n".join(notes) if notes else "✅ Auto-config complete."
+
+# -------------------- PLAYLIST QUEUE --------------------
+class PlaylistQueue:
+    """
+    Pending tracks for one guild. Stored as a list of blocks (<= 2*BLOCK tracks each) with a
+    Fenwick tree over the block sizes, so indexing, insert and removal at any position cost
+    O(log n + BLOCK) instead of copying the whole queue. `version` increases on every change
+    so readers can detect modifications cheaply; get() waits for the queue to be non-empty.
+    """
+
+    BLOCK = 256
+
+    def __init__(self, items: Iterable[Track] = ()):
+        self._blocks: list[list[Track]] = []
+        self._tree: list[int] = [0]
+        self._len = 0
+        self.version = 0
+        self._reported_len = 0  # what this queue has added to M_QUEUED_TRACKS
+        self._not_empty = asyncio.Event()
+        self._rebuild(list(items))
+
+    # ---- internals ----
+    def _rebuild(self, items: list) -> None:
+        self._blocks = [items[i:i + self.BLOCK] for i in range(0, len(items), self.BLOCK)]
+        self._len = len(items)
+        self._build_tree()
+        self._changed()
+
+    def _build_tree(self) -> None:
+        n = len(self._blocks)
+        tree = [0] * (n + 1)
+        for i, block in enumerate(self._blocks, start=1):
+            tree[i] += len(block)
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, block_index: int, delta: int) -> None:
+        i, n = block_index + 1, len(self._blocks)
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """(block index, offset in block) for a 0-based position < len."""
+        pos, rem, n = 0, index, len(self._blocks)
+        step = 1 << (n.bit_length() - 1) if n else 0
+        while step:
+            nxt = pos + step
+            if nxt <= n and self._tree[nxt] <= rem:
+                pos = nxt
+                rem -= self._tree[nxt]
+            step >>= 1
+        return pos, rem
+
+    def _norm(self, index: int) -> int:
+        if index < 0:
+            index += self._len
+        if index < 0 or index >= self._len:
+            raise IndexError("Index out of range.")
+        return index
+
+    def _changed(self) -> None:
+        self.version += 1
+        if self._len != self._reported_len:
+            M_QUEUED_TRACKS.inc(self._len - self._reported_len)
+            self._reported_len = self._len
+        if self._len:
+            self._not_empty.set()
+        else:
+            self._not_empty.clear()
+
+    # ---- reads ----
+    def __len__(self) -> int:
+        return self._len
+
+    def qsize(self) -> int:
+        return self._len
+
+    def empty(self) -> bool:
+        return self._len == 0
+
+    def __getitem__(self, index: int) -> Track:
+        bi, off = self._locate(self._norm(index))
+        return self._blocks[bi][off]
+
+    def peek(self) -> Optional[Track]:
+        return self._blocks[0][0] if self._len else None
+
+    def slice(self, start: int, stop: int) -> list:
+        """Tracks in [start, stop) without copying the rest of the queue."""
+        start, stop = max(0, start), min(stop, self._len)
+        if start >= stop:
+            return []
+        bi, off = self._locate(start)
+        out: list = []
+        need = stop - start
+        while need > 0:
+            chunk = self._blocks[bi][off:off + need]
+            out.extend(chunk)
+            need -= len(chunk)
+            bi, off = bi + 1, 0
+        return out
+
+    def __iter__(self):
+        for block in self._blocks:
+            yield from block
+
+    # ---- writes ----
+    def append(self, item: Track) -> None:
+        self.insert(self._len, item)
+
+    def appendleft(self, item: Track) -> None:
+        self.insert(0, item)
+
+    def extend(self, items: Iterable[Track]) -> Tuple[int, int]:
+        """Append many tracks at once; returns the 1-based (first, last) positions they landed at."""
+        items = list(items)
+        first = self._len + 1
+        if not items:
+            return first, first - 1
+        if self._blocks and len(self._blocks[-1]) < self.BLOCK:
+            room = self.BLOCK - len(self._blocks[-1])
+            self._blocks[-1].extend(items[:room])
+            items = items[room:]
+        for i in range(0, len(items), self.BLOCK):
+            self._blocks.append(items[i:i + self.BLOCK])
+        self._len = sum(len(b) for b in self._blocks)
+        self._build_tree()
+        self._changed()
+        return first, self._len
+
+    def insert(self, index: int, item: Track) -> None:
+        index = max(0, min(index, self._len))
+        if not self._blocks:
+            self._blocks.append([item])
+            self._len = 1
+            self._build_tree()
+            self._changed()
+            return
+        if index == self._len:
+            bi, off = len(self._blocks) - 1, len(self._blocks[-1])
+        else:
+            bi, off = self._locate(index)
+        block = self._blocks[bi]
+        block.insert(off, item)
+        self._len += 1
+        if len(block) > 2 * self.BLOCK:
+            self._blocks[bi:bi + 1] = [block[:self.BLOCK], block[self.BLOCK:]]
+            self._build_tree()
+        else:
+            self._tree_add(bi, 1)
+        self._changed()
+
+    def pop(self, index: int = -1) -> Track:
+        bi, off = self._locate(self._norm(index))
+        block = self._blocks[bi]
+        item = block.pop(off)
+        self._len -= 1
+        if block:
+            self._tree_add(bi, -1)
+        else:
+            del self._blocks[bi]
+            self._build_tree()
+        self._changed()
+        return item
+
+    def popleft(self) -> Track:
+        return self.pop(0)
+
+    def remove(self, item: Track) -> bool:
+        """Remove a specific Track object (by identity). Returns False if it isn't queued."""
+        for i, t in enumerate(self):
+            if t is item:
+                self.pop(i)
+                return True
+        return False
+
+    def drop_front(self, n: int) -> int:
+        """Remove the first n tracks; returns how many were removed."""
+        n = max(0, min(n, self._len))
+        if not n:
+            return 0
+        bi, off = self._locate(n) if n < self._len else (len(self._blocks), 0)
+        del self._blocks[:bi]
+        if off:
+            del self._blocks[0][:off]
+        self._len -= n
+        self._build_tree()
+        self._changed()
+        return n
+
+    def clear(self) -> int:
+        n = self._len
+        self._blocks = []
+        self._tree = [0]
+        self._len = 0
+        self._changed()
+        return n
+
+    def shuffle(self) -> int:
+        items = list(self)
+        random.shuffle(items)
+        self._rebuild(items)
+        return len(items)
+
+    # ---- asyncio.Queue-style consumption ----
+    def get_nowait(self) -> Track:
+        if not self._len:
+            raise asyncio.QueueEmpty
+        return self.popleft()
+
+    async def get(self) -> Track:
+        while not self._len:
+            await self._not_empty.wait()
+        return self.popleft()
+
+# -------------------- TIMER WHEEL --------------------
+class WheelTimer:
+    __slots__ = ("tick", "callback", "level", "slot")
+
+    def __init__(self, tick: int, callback: Callable[[], None]):
+        self.tick = tick
+        self.callback = callback
+        self.level = -1  # -1 = not armed (fired or cancelled)
+        self.slot = 0
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel shared by every MusicPlayer for its idle, empty-channel
+    and progress-tick deadlines. Arming or cancelling is O(1); the wheel itself is
+    driven by a single loop.call_at alarm that is only set for the next occupied
+    slot (or the next cascade boundary), so idle guilds cost no wakeups at all.
+
+    Level 0 has SLOTS ticks of TICK seconds; each higher level is SLOTS times coarser.
+    """
+
+    TICK = 0.25
+    SLOTS = 64
+    LEVELS = 3
+
+    def __init__(self):
+        self._origin = time.monotonic()
+        self._now = 0  # last tick processed
+        self._wheels: list[list[set]] = [[set() for _ in range(self.SLOTS)] for _ in range(self.LEVELS)]
+        self._alarm: Optional[asyncio.TimerHandle] = None
+        self._alarm_tick: Optional[int] = None
+        self.active = 0
+        self.wakeups = 0
+        self.fired = 0
+        self.cascaded = 0
+
+    def _tick_of(self, when: float) -> int:
+        return int(-(-(when - self._origin) // self.TICK))  # ceil: never fire early
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> WheelTimer:
+        return self.call_at(time.monotonic() + delay, callback)
+
+    def call_at(self, when: float, callback: Callable[[], None]) -> WheelTimer:
+        timer = WheelTimer(max(self._tick_of(when), self._now + 1), callback)
+        self._place(timer)
+        self.active += 1
+        if self._alarm_tick is None or timer.tick < self._alarm_tick:
+            self._arm()
+        return timer
+
+    def cancel(self, timer: Optional[WheelTimer]) -> None:
+        if timer is None or timer.level < 0:
+            return
+        self._wheels[timer.level][timer.slot].discard(timer)
+        timer.level = -1
+        self.active -= 1
+
+    def _place(self, timer: WheelTimer) -> None:
+        delta = timer.tick - self._now
+        span = 1
+        for level in range(self.LEVELS):
+            if delta < span * self.SLOTS or level == self.LEVELS - 1:
+                pos = timer.tick // span
+                if delta >= span * self.SLOTS:
+                    pos = self._now // span + self.SLOTS - 1  # beyond the horizon: park in the farthest slot
+                timer.level, timer.slot = level, pos % self.SLOTS
+                self._wheels[level][timer.slot].add(timer)
+                return
+            span *= self.SLOTS
+
+    def _next_tick(self) -> Optional[int]:
+        """Next tick worth waking for: an occupied level-0 slot, else the next cascade."""
+        if not self.active:
+            return None
+        level0 = self._wheels[0]
+        boundary = (self._now // self.SLOTS + 1) * self.SLOTS
+        for t in range(self._now + 1, boundary):
+            if level0[t % self.SLOTS]:
+                return t
+        return boundary
+
+    def _arm(self) -> None:
+        if self._alarm is not None:
+            self._alarm.cancel()
+            self._alarm = None
+        self._alarm_tick = self._next_tick()
+        if self._alarm_tick is None:
+            return
+        loop = asyncio.get_running_loop()
+        delay = self._origin + self._alarm_tick * self.TICK - time.monotonic()
+        self._alarm = loop.call_at(loop.time() + max(0.0, delay), self._on_alarm)
+
+    def _cascade(self, level: int) -> None:
+        span = self.SLOTS ** level
+        bucket = self._wheels[level][(self._now // span) % self.SLOTS]
+        if not bucket:
+            return
+        timers = list(bucket)
+        bucket.clear()
+        for timer in timers:
+            self._place(timer)
+        self.cascaded += len(timers)
+
+    def _on_alarm(self) -> None:
+        self._alarm = None
+        self.wakeups += 1
+        # Process through the tick we were armed for, or further if the loop ran late
+        # (catching up is cheap: an empty slot is just a set check).
+        elapsed = int((time.monotonic() - self._origin) // self.TICK)
+        target = max(self._alarm_tick or self._now, elapsed)
+        while self._now < target:
+            self._now += 1
+            for level in range(self.LEVELS - 1, 0, -1):
+                if self._now % (self.SLOTS ** level) == 0:
+                    self._cascade(level)
+            bucket = self._wheels[0][self._now % self.SLOTS]
+            if bucket:
+                due = list(bucket)
+                bucket.clear()
+                for timer in due:
+                    timer.level = -1
+                    self.active -= 1
+                    self.fired += 1
+                    try:
+                        timer.callback()
+                    except Exception:
+                        logger.exception("Timer callback failed")
+        self._arm()
+
+    def stats(self) -> dict:
+        return {
+            "active_timers": self.active,
+            "wakeups": self.wakeups,
+            "fired": self.fired,
+            "cascaded": self.cascaded,
+            "tick_seconds": self.TICK,
+        }
+
+TIMERS = TimerWheel()
+
+# -------------------- VOICE LISTENERS --------------------
+class VoiceListenerIndex:
+    """
+    Non-bot listeners per voice channel, kept up to date from on_voice_state_update so
+    "is the channel empty?" is a len() instead of a walk over channel.members (which,
+    with the default intents, isn't even reliably populated).
+
+    Only channels a player is connected to are tracked: watch() seeds one from the
+    guild's voice states, forget() drops it.
+    """
+
+    def __init__(self):
+        self._channels: Dict[int, set[int]] = {}
+        self.updates = 0
+
+    def watch(self, channel: discord.abc.GuildChannel, self_id: int) -> None:
+        if channel.id in self._channels:
+            return
+        guild = channel.guild
+        listeners = set()
+        for uid in getattr(channel, "voice_states", {}):
+            if uid == self_id:
+                continue
+            member = guild.get_member(uid)
+            # Unknown members (no member cache) count as listeners: never disconnect on a guess.
+            if member is None or not member.bot:
+                listeners.add(uid)
+        self._channels[channel.id] = listeners
+
+    def forget(self, channel_id: int) -> None:
+        self._channels.pop(channel_id, None)
+
+    def update(self, member: discord.Member, before: Optional[discord.abc.GuildChannel], after: Optional[discord.abc.GuildChannel]) -> None:
+        if member.bot:
+            return
+        self.updates += 1
+        if before is not None and before.id in self._channels:
+            self._channels[before.id].discard(member.id)
+        if after is not None and after.id in self._channels:
+            self._channels[after.id].add(member.id)
+
+    def count(self, channel_id: int) -> Optional[int]:
+        listeners = self._channels.get(channel_id)
+        return None if listeners is None else len(listeners)
+
+    def stats(self) -> dict:
+        return {"channels": len(self._channels), "listeners": sum(len(v) for v in self._channels.values()), "updates": self.updates}
+
+LISTENERS = VoiceListenerIndex()
+
+# -------------------- PANEL EDIT SCHEDULER --------------------
+class _TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "stamp")
+
+    def __init__(self, count: float, per_seconds: float):
+        self.capacity = max(1.0, float(count))
+        self.rate = self.capacity / max(0.001, per_seconds)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def full(self, now: float) -> bool:
+        """True once refilled to capacity, i.e. indistinguishable from a fresh bucket."""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+    def block(self, now: float, seconds: float) -> None:
+        """Drain the bucket so nothing is granted for at least `seconds`."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class _EditJob:
+    __slots__ = ("player", "message", "forced", "enqueued_at")
+
+    def __init__(self, player: "MusicPlayer", message: discord.Message, forced: bool):
+        self.player = player
+        self.message = message
+        self.forced = forced
+        self.enqueued_at = time.monotonic()
+
 
-    role = discord.utils.get(guild.roles, name=MUSIC_ROLE_NAME)
+class PanelEditScheduler:
+    """
+    Owns every panel / now-playing edit. Requests are coalesced per message (the
+    edit renders whatever the player shows when it actually runs), forced updates
+    from buttons/commands go ahead of progress ticks, and edits are paced by a
+    global and a per-channel token bucket so we stay under Discord's limits
+    instead of discovering them through 429s.
+    """
 
-    if not can_manage_roles:
-        notes.append("❌ Missing **Manage Roles** — can't create/assign role automatically.")
-    else:
-        if role is None:
-            try:
-                role = await guild.create_role(
-                    name=MUSIC_ROLE_NAME,
-                    permissions=_music_role_permissions(),
-                    reason="Auto-config for music bot",
-                )
-                notes.append(f"✅ Created role **{MUSIC_ROLE_NAME}**.")
-            except Exception as e:
-                notes.append(f"❌ Failed to create role: `{e}`")
-                role = None
+    def __init__(self, per_second: float, channel_edits: int, channel_window: float, concurrency: int):
+        self._global = _TokenBucket(per_second, 1.0)
+        self._channel_edits = channel_edits
+        self._channel_window = channel_window
+        self._channels: Dict[int, _TokenBucket] = {}
+        self._pruned_at = time.monotonic()
+        self._concurrency = max(1, concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+        self._jobs: Dict[int, _EditJob] = {}  # message id -> pending (coalesced) job
+        self._forced: "OrderedDict[int, None]" = OrderedDict()
+        self._ticks: "OrderedDict[int, None]" = OrderedDict()
+        self._inflight: set[int] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.requested = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self._latency_ms: Dict[str, Deque[int]] = {"forced": deque(maxlen=200), "tick": deque(maxlen=200)}
+
+    def _bucket(self, channel_id: int) -> _TokenBucket:
+        b = self._channels.get(channel_id)
+        if b is None:
+            b = self._channels[channel_id] = _TokenBucket(self._channel_edits, self._channel_window)
+        return b
+
+    def request(self, player: "MusicPlayer", message: discord.Message, forced: bool = False) -> None:
+        self.requested += 1
+        job = self._jobs.get(message.id)
+        if job is not None:
+            self.coalesced += 1
+            job.message = message
+            if forced and not job.forced:
+                job.forced = True
+                self._ticks.pop(message.id, None)
+                self._forced[message.id] = None
         else:
-            try:
-                desired = _music_role_permissions()
-                merged = discord.Permissions(role.permissions.value | desired.value)
-                if merged.value != role.permissions.value:
-                    await role.edit(permissions=merged, reason="Auto-config (merge perms)")
-                notes.append(f"✅ Found role **{MUSIC_ROLE_NAME}**.")
-            except Exception as e:
-                notes.append(f"⚠️ Couldn't update role perms: `{e}`")
+            self._jobs[message.id] = _EditJob(player, message, forced)
+            (self._forced if forced else self._ticks)[message.id] = None
 
-        if role is not None:
-            try:
-                if role not in me.roles:
-                    await me.add_roles(role, reason="Auto-config for music bot")
-                    notes.append("✅ Assigned role to the bot.")
-            except Exception as e:
-                notes.append(f"❌ Failed to assign role: `{e}`")
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        self._wake.set()
 
-    if not can_manage_channels:
-        notes.append("❌ Missing **Manage Channels** — can't set channel overwrites automatically.")
-    else:
-        try:
-            if role is not None:
-                ow = text_channel.overwrites_for(role)
-                ow.view_channel = True
-                ow.send_messages = True
-                ow.embed_links = True
-                ow.read_message_history = True
-                ow.add_reactions = True
-                ow.send_messages_in_threads = True
-                await text_channel.set_permissions(role, overwrite=ow, reason="Auto-config for music bot")
-                notes.append(f"✅ Set permissions for **{MUSIC_ROLE_NAME}** in {text_channel.mention}.")
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            delay = self._dispatch()
+            if delay is None:
+                await self._wake.wait()
             else:
-                ow = text_channel.overwrites_for(me)
-                ow.view_channel = True
-                ow.send_messages = True
-                ow.embed_links = True
-                ow.read_message_history = True
-                ow.add_reactions = True
-                ow.send_messages_in_threads = True
-                await text_channel.set_permissions(me, overwrite=ow, reason="Auto-config (member overwrite)")
-                notes.append(f"✅ Set permissions for the bot in {text_channel.mention}.")
-        except Exception as e:
-            notes.append(f"❌ Failed to set channel overwrites: `{e}`")
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
 
-    return "\n".join(notes) if notes else "✅ Auto-config complete."
+    def _dispatch(self) -> Optional[float]:
+        """Start every edit the budgets allow; return how long until the next one could go."""
+        now = time.monotonic()
+        self._prune_buckets(now)
+        soonest: Optional[float] = None
+        for lane in (self._forced, self._ticks):
+            for mid in list(lane):
+                if len(self._inflight) >= self._concurrency:
+                    return soonest  # woken again when an edit finishes
+                if mid in self._inflight:
+                    continue  # one edit per message at a time; re-run after the current one lands
+                wait = self._global.wait_time(now)
+                if wait > 0:
+                    return wait if soonest is None else min(soonest, wait)
+                job = self._jobs[mid]
+                bucket = self._bucket(job.message.channel.id)
+                wait = bucket.wait_time(now)
+                if wait > 0:
+                    soonest = wait if soonest is None else min(soonest, wait)
+                    continue
+                self._global.take(now)
+                bucket.take(now)
+                del lane[mid]
+                del self._jobs[mid]
+                self._inflight.add(mid)
+                task = asyncio.create_task(self._edit(job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        return soonest
+
+    def _prune_buckets(self, now: float) -> None:
+        """Forget channels whose bucket has refilled; a new one starts full anyway. At most once per window."""
+        if now - self._pruned_at < self._channel_window:
+            return
+        self._pruned_at = now
+        for cid in [cid for cid, b in self._channels.items() if b.full(now)]:
+            del self._channels[cid]
+
+    async def _edit(self, job: _EditJob) -> None:
+        p, msg = job.player, job.message
+        try:
+            if msg is not p._panel_message and msg is not p._nowplaying_message:
+                self.dropped += 1  # replaced by a newer message while queued
+                return
+            if await p._edit_ui_message(msg):
+                p._last_np_edit = time.monotonic()
+            self.completed += 1
+            latency = time.monotonic() - job.enqueued_at
+            self._latency_ms["forced" if job.forced else "tick"].append(int(latency * 1000))
+            M_PANEL_EDIT_LATENCY.observe(latency)
+        except discord.NotFound:
+            self.failed += 1
+            if msg is p._panel_message:
+                p._panel_message = None
+                p.spawn_bg(p.ensure_panel_message())
+            elif msg is p._nowplaying_message:
+                p._nowplaying_message = None
+        except discord.HTTPException as e:
+            self.failed += 1
+            if e.status == 429:
+                self.rate_limited += 1
+                self._bucket(msg.channel.id).block(time.monotonic(), float(getattr(e, "retry_after", 0) or self._channel_window))
+        except Exception:
+            self.failed += 1
+        finally:
+            self._inflight.discard(msg.id)
+            if self._wake is not None:
+                self._wake.set()
+
+    def stats(self) -> dict:
+        def _summary(samples: Deque[int]) -> dict:
+            vals = sorted(samples)
+            if not vals:
+                return {"p50": None, "p95": None, "max": None}
+            return {"p50": vals[len(vals) // 2], "p95": vals[min(len(vals) - 1, int(len(vals) * 0.95))], "max": vals[-1]}
+
+        return {
+            "queue_depth": len(self._jobs),
+            "queue_forced": len(self._forced),
+            "in_flight": len(self._inflight),
+            "channels_tracked": len(self._channels),
+            "requested": self.requested,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "dropped_stale": self.dropped,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "latency_ms": {lane: _summary(samples) for lane, samples in self._latency_ms.items()},
+            "budget": {
+                "global_per_second": PANEL_EDITS_PER_SECOND,
+                "per_channel": f"{self._channel_edits}/{self._channel_window:g}s",
+            },
+        }
+
+PANEL_EDITS = PanelEditScheduler(PANEL_EDITS_PER_SECOND, PANEL_CHANNEL_EDITS, PANEL_CHANNEL_WINDOW, PANEL_EDIT_CONCURRENCY)
+METRICS.collect("counter", "musicbot_panel_edits_total", "Panel edit requests by outcome.", lambda: {
+    "edited": PANEL_EDITS.completed,
+    "coalesced": PANEL_EDITS.coalesced,
+    "dropped_stale": PANEL_EDITS.dropped,
+    "failed": PANEL_EDITS.failed,
+}, label="result")
+METRICS.collect("counter", "musicbot_panel_rate_limited_total", "Panel edits that got HTTP 429.", lambda: PANEL_EDITS.rate_limited)
+METRICS.collect("gauge", "musicbot_panel_edit_queue_depth", "Panel edits waiting for budget.", lambda: len(PANEL_EDITS._jobs))
 
 # -------------------- MUSIC PLAYER --------------------
 class MusicPlayer:
@@ -369,7 +2655,7 @@ class MusicPlayer:
         self.client = client
         self.guild_id = int(guild_id)
 
-        self.queue: asyncio.Queue[Track] = asyncio.Queue()
+        self.queue = PlaylistQueue()
         self.current: Optional[Track] = None
         self.voice: Optional[discord.VoiceClient] = None
         self.text_channel: Optional[discord.abc.Messageable] = None
@@ -379,7 +2665,7 @@ class MusicPlayer:
         self._bg_tasks: set[asyncio.Task] = set()
 
         self._nowplaying_message: Optional[discord.Message] = None
-        self._np_update_task: Optional[asyncio.Task] = None
+        self._np_timer: Optional[WheelTimer] = None
 
         # Persistent “Music Panel” message we keep editing (avoids spamming Now Playing messages)
         self._panel_message: Optional[discord.Message] = None
@@ -389,15 +2675,55 @@ class MusicPlayer:
         self._paused_total: float = 0.0
 
         self._last_np_edit: float = 0.0
-        self._np_interval: float = 1.0
+
+        # Diff-aware panel edits: message id -> render state it currently shows
+        self._rendered: Dict[int, tuple] = {}
+        # Render caches: static per-track embed parts and the button view for the current state
+        self._fragments: Optional[NowPlayingFragments] = None
+        self._fragments_track: Optional[Track] = None
+        self._view: Optional["NowPlayingView"] = None
+        self._view_key: Optional[tuple] = None
+        self._edits_total: int = 0
+        self._edits_suppressed: int = 0
+        self._panel_posts: int = 0
+        # Edit-in-place on track change: messages posted below the panel since it was posted
+        self._messages_since_panel: int = 0
+        self._panel_reused: int = 0
+        self._panel_reposts: int = 0
+        self._panel_repost_task: Optional[asyncio.Task] = None
+        self._edit_times: Deque[float] = deque(maxlen=600)
 
         self.volume: float = max(0.0, min(DEFAULT_VOLUME, 2.0))
         self.history: Deque[Track] = deque(maxlen=25)
 
         # Auto-disconnect tracking
         self._last_activity: float = time.monotonic()
-        self._disconnect_watch_task: Optional[asyncio.Task] = None
+        self._idle_timer: Optional[WheelTimer] = None
+        self._empty_timer: Optional[WheelTimer] = None
         self._empty_since: Optional[float] = None
+        self._disconnect_task: Optional[asyncio.Task] = None
+
+        # Look-ahead resolution of the pending queue head
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self._prefetch_targets: Tuple[str, ...] = ()
+
+        # What's feeding the current track (see playback_path); needed to rebuild it on volume change
+        self._current_resolved: Optional[ResolvedTrack] = None
+        self._playback_path: Optional[str] = None
+        self._from_disk: bool = False
+        self._source_stale: bool = False
+        self._source_refresh_task: Optional[asyncio.Task] = None
+
+        # Gapless transitions: the source given to voice.play() and the task priming the next track
+        self._transition: Optional[TransitionSource] = None
+        self._transition_task: Optional[asyncio.Task] = None
+        self._handover: Optional[Tuple[NextUp, float]] = None
+        self._handovers: int = 0
+
+        # Dead air between consecutive tracks: track end -> first audio frame of the next one
+        # (only measured when the queue wasn't empty)
+        self._track_ended_at: Optional[float] = None
+        self._gaps_ms: Deque[int] = deque(maxlen=20)
 
     def set_channel(self, channel: discord.abc.Messageable):
         self.text_channel = channel
@@ -411,6 +2737,7 @@ class MusicPlayer:
 
         if self.voice and self.voice.is_connected():
             if self.voice.channel != channel:
+                LISTENERS.forget(self.voice.channel.id)
                 await self.voice.move_to(channel)
         else:
             self.voice = await channel.connect()
@@ -425,11 +2752,27 @@ class MusicPlayer:
 
     async def add_track(self, track: Track):
         self.mark_activity()
-        await self.queue.put(track)
+        self.queue.append(track)
+        self._queue_changed()
         self.start_if_needed()
+        if track.trace:
+            track.trace.mark("enqueue")
 
     def add_track_front(self, track: Track):
-        self.queue._queue.appendleft(track)
+        self.queue.appendleft(track)
+        self._queue_changed()
+
+    async def add_tracks(self, tracks: Iterable[Track]) -> Tuple[int, int]:
+        """
+        Append a batch of tracks (e.g. one playlist page) in one step: a single queue change,
+        look-ahead refresh and player start. Returns the 1-based (first, last) queue positions.
+        """
+        self.mark_activity()
+        first, last = self.queue.extend(tracks)
+        if last >= first:
+            self._queue_changed()
+            self.start_if_needed()
+        return first, last
 
     async def add_track_next(self, track: Track):
         self.mark_activity()
@@ -437,14 +2780,143 @@ class MusicPlayer:
         self.add_track_front(track)
         self.start_if_needed()
 
-    def spawn_bg(self, coro):
+    def spawn_bg(self, coro) -> asyncio.Task:
         task = asyncio.create_task(coro)
         self._bg_tasks.add(task)
         task.add_done_callback(lambda t: self._bg_tasks.discard(t))
+        return task
 
     # ---------------- Queue ops ----------------
-    def queue_snapshot(self):
-        return list(self.queue._queue)
+    def queue_snapshot(self, limit: Optional[int] = None):
+        return self.queue.slice(0, len(self.queue) if limit is None else limit)
+
+    def _queue_changed(self):
+        """Call after any change to the pending queue so the look-ahead follows the new head."""
+        self._schedule_prefetch()
+        tr = self._transition
+        if tr is None:
+            return
+        if tr.has_next():
+            if tr.next_track() is not self.queue.peek():
+                tr.clear_next()
+                self._schedule_transition()
+        elif (self._transition_task is None or self._transition_task.done()) and self.queue.peek() is not None:
+            # The prepare task already gave up on an empty queue (e.g. a track queued during
+            # the last GAPLESS_PRIME_SECONDS); try again for the new head.
+            self._schedule_transition()
+
+    def _schedule_prefetch(self):
+        if PREFETCH_DEPTH <= 0:
+            return
+        heads = self.queue.slice(0, PREFETCH_DEPTH)
+        targets = tuple(t.query for t in heads)
+        if targets == self._prefetch_targets:
+            return
+        if self._prefetch_task and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+        self._prefetch_targets = targets
+        self._prefetch_task = asyncio.create_task(self._prefetch(heads)) if heads else None
+
+    async def _prefetch(self, tracks: list):
+        """Resolve upcoming tracks into RESOLVE_CACHE while the current one plays."""
+        for t in tracks:
+            try:
+                await resolve_track(t, self.guild_id)
+            except asyncio.CancelledError:
+                return
+            except Exception as e:
+                logger.warning("Prefetch failed for %r: %s", t.query, e)
+
+    def _cancel_prefetch(self):
+        if self._prefetch_task and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+        self._prefetch_task = None
+        self._prefetch_targets = ()
+
+    def gap_stats(self) -> dict:
+        gaps = list(self._gaps_ms)
+        return {
+            "last_ms": gaps[-1] if gaps else None,
+            "avg_ms": int(sum(gaps) / len(gaps)) if gaps else None,
+            "max_ms": max(gaps) if gaps else None,
+            "samples": len(gaps),
+            "gapless_handovers": self._handovers,
+        }
+
+    # ---------------- Gapless transitions ----------------
+    def _transition_event(self, kind: str, payload: Any):
+        """Called from the audio thread by TransitionSource."""
+        self.client.loop.call_soon_threadsafe(self._on_transition_event, kind, payload)
+
+    def _on_transition_event(self, kind: str, payload: Any):
+        if kind == "first_frame":
+            boundary_at, first_at = payload
+            if boundary_at is not None:
+                self._gaps_ms.append(max(0, int((first_at - boundary_at) * 1000)))
+            trace = self.current.trace if self.current else None
+            if trace:
+                trace.mark("first_frame", at=first_at)
+                TRACES.finish(trace)
+        elif kind == "handover":
+            self._handover = payload
+            self._handovers += 1
+            if self._track_done:
+                self._track_done.set()
+
+    def _schedule_transition(self):
+        if not GAPLESS or self._transition is None:
+            return
+        if self._transition_task and not self._transition_task.done():
+            self._transition_task.cancel()
+        self._transition_task = asyncio.create_task(self._prepare_transition(self._transition))
+
+    def _cancel_transition(self):
+        if self._transition_task and not self._transition_task.done():
+            self._transition_task.cancel()
+        self._transition_task = None
+        if self._transition is not None:
+            self._transition.clear_next()
+
+    async def _prepare_transition(self, transition: TransitionSource):
+        """Shortly before the current track ends, spawn and prime FFmpeg for the queue head."""
+        lead = GAPLESS_PRIME_SECONDS + max(0.0, CROSSFADE_SECONDS)
+        primed: Optional[PrimedSource] = None
+        try:
+            while True:
+                remaining = self._remaining_seconds()
+                if remaining is None:
+                    return
+                if remaining <= lead:
+                    break
+                await asyncio.sleep(min(remaining - lead, 5.0))
+
+            track = self.queue.peek()
+            if track is None or self._transition is not transition:
+                return
+            info = resolved_from_disk(track) or await resolve_track(track, self.guild_id)
+            local = AUDIO_CACHE.lookup(info.id, count=False) if AUDIO_CACHE else None
+            primed = PrimedSource(make_audio_source(info, self.volume, local_path=local))
+            prime = asyncio.ensure_future(asyncio.to_thread(primed.prime))
+            try:
+                ok = await asyncio.shield(prime)
+            except asyncio.CancelledError:
+                # The worker thread is still inside prime(); killing FFmpeg under it has to wait.
+                _cleanup_when_done(prime, primed)
+                primed = None
+                raise
+
+            if not ok or self.queue.peek() is not track or self._transition is not transition:
+                primed.cleanup()
+                return
+            transition.set_next(NextUp(primed, track, info, local))
+            primed = None
+        except asyncio.CancelledError:
+            if primed is not None:
+                primed.cleanup()
+        except Exception as e:
+            logger.warning("Gapless: failed to prepare next track: %s", e)
+            if primed is not None:
+                primed.cleanup()
 
 
     def mark_activity(self):
@@ -452,107 +2924,118 @@ class MusicPlayer:
         self._last_activity = time.monotonic()
 
     def _start_disconnect_watcher(self):
-        """Start (or restart) the background watcher that auto-disconnects when unused/empty."""
-        if self._disconnect_watch_task and not self._disconnect_watch_task.done():
+        """Arm the idle and empty-channel deadlines on the shared timer wheel (no-op if armed)."""
+        if self._idle_timer is None:
+            self._idle_timer = TIMERS.call_at(self._last_activity + IDLE_DISCONNECT_SECONDS, self._idle_deadline)
+        self.listeners_changed()
+
+    def _cancel_disconnect_timers(self):
+        TIMERS.cancel(self._idle_timer)
+        TIMERS.cancel(self._empty_timer)
+        self._idle_timer = None
+        self._empty_timer = None
+        self._empty_since = None
+
+    def listeners_changed(self):
+        """Voice-state hook: start or cancel the empty-channel countdown."""
+        if not self.voice or not self.voice.is_connected():
+            return
+        ch = getattr(self.voice, "channel", None)
+        if ch is None:
+            return
+        LISTENERS.watch(ch, self.client.user.id)
+        empty = LISTENERS.count(ch.id) == 0
+        if empty and self._empty_timer is None:
+            self._empty_since = time.monotonic()
+            self._empty_timer = TIMERS.call_later(EMPTY_CHANNEL_DISCONNECT_SECONDS, self._empty_deadline)
+        elif not empty and self._empty_timer is not None:
+            TIMERS.cancel(self._empty_timer)
+            self._empty_timer = None
+            self._empty_since = None
+
+    def _empty_deadline(self):
+        self._empty_timer = None
+        self._empty_since = None
+        if not self.voice or not self.voice.is_connected():
             return
+        self._disconnect_with_notice("👋 Disconnecting: nobody is in the voice channel.")
 
-        async def loop():
-            try:
-                while True:
-                    await asyncio.sleep(5)
-                    if not self.voice or not self.voice.is_connected():
-                        return
-
-                    ch = getattr(self.voice, "channel", None)
-                    if ch is None:
-                        continue
-
-                    # Condition A: No non-bot users in the voice channel
-                    nonbot_members = [m for m in getattr(ch, "members", []) if not getattr(m, "bot", False)]
-                    now = time.monotonic()
-                    if len(nonbot_members) == 0:
-                        if self._empty_since is None:
-                            self._empty_since = now
-                        elif (now - self._empty_since) >= EMPTY_CHANNEL_DISCONNECT_SECONDS:
-                            if self.text_channel:
-                                try:
-                                    await self.text_channel.send("👋 Disconnecting: nobody is in the voice channel.")
-                                except Exception:
-                                    pass
-                            await self.stop()
-                            return
-                    else:
-                        self._empty_since = None
-
-                    # Condition B: Bot is idle (not playing/paused, no queue) for a while
-                    is_busy = False
-                    try:
-                        is_busy = bool(self.voice.is_playing() or self.voice.is_paused())
-                    except Exception:
-                        is_busy = False
-
-                    if (not is_busy) and self.queue.empty() and (now - self._last_activity) >= IDLE_DISCONNECT_SECONDS:
-                        if self.text_channel:
-                            try:
-                                await self.text_channel.send("👋 Disconnecting: idle (no playback/queue/activity).")
-                            except Exception:
-                                pass
-                        await self.stop()
-                        return
-            except asyncio.CancelledError:
-                return
+    def _idle_deadline(self):
+        self._idle_timer = None
+        if not self.voice or not self.voice.is_connected():
+            return
+
+        try:
+            is_busy = bool(self.voice.is_playing() or self.voice.is_paused())
+        except Exception:
+            is_busy = False
+        if is_busy or not self.queue.empty():
+            self._idle_timer = TIMERS.call_later(IDLE_DISCONNECT_SECONDS, self._idle_deadline)
+            return
+
+        due = self._last_activity + IDLE_DISCONNECT_SECONDS
+        if time.monotonic() < due:
+            # There was activity since this deadline was set; push it back instead of polling.
+            self._idle_timer = TIMERS.call_at(due, self._idle_deadline)
+            return
+        self._disconnect_with_notice("👋 Disconnecting: idle (no playback/queue/activity).")
 
-        self._disconnect_watch_task = asyncio.create_task(loop())
+    def _disconnect_with_notice(self, notice: str):
+        async def run():
+            if self.text_channel:
+                try:
+                    await self.text_channel.send(notice)
+                except Exception:
+                    pass
+            await self.stop()
+
+        # Not in _bg_tasks: stop() cancels those.
+        self._disconnect_task = asyncio.create_task(run())
 
 
     def pending_queue_len(self) -> int:
-        return len(self.queue._queue)
+        return len(self.queue)
+
+    @staticmethod
+    def _abandon_traces(tracks: Iterable[Track]) -> None:
+        """Close the /play traces of tracks that leave the queue without ever playing."""
+        for track in tracks:
+            if track is not None and track.trace is not None:
+                TRACES.finish(track.trace, error="abandoned")
 
     def clear_queue(self) -> int:
-        cleared = 0
-        try:
-            while True:
-                self.queue.get_nowait()
-                cleared += 1
-        except asyncio.QueueEmpty:
-            pass
+        self._abandon_traces(self.queue)
+        cleared = self.queue.clear()
+        self._queue_changed()
         return cleared
 
     def shuffle_queue(self) -> int:
-        q = self.queue._queue
-        items = list(q)
-        random.shuffle(items)
-        q.clear()
-        q.extend(items)
-        return len(items)
+        n = self.queue.shuffle()
+        self._queue_changed()
+        return n
 
     def remove_from_queue(self, index_1_based: int) -> Track:
         if index_1_based <= 0:
             raise ValueError("Index must be 1 or greater.")
-        q = self.queue._queue
-        items = list(q)
         idx = index_1_based - 1
-        if idx < 0 or idx >= len(items):
+        if idx >= len(self.queue):
             raise IndexError("Index out of range.")
-        removed = items.pop(idx)
-        q.clear()
-        q.extend(items)
+        removed = self.queue.pop(idx)
+        self._abandon_traces((removed,))
+        self._queue_changed()
         return removed
 
     def skip_to_queue_index(self, index_1_based: int) -> int:
         if index_1_based <= 0:
             raise ValueError("Index must be 1 or greater.")
-        q = self.queue._queue
-        items = list(q)
         idx = index_1_based - 1
-        if idx < 0 or idx >= len(items):
+        if idx >= len(self.queue):
             raise IndexError("Index out of range.")
-        dropped = items[:idx]
-        remaining = items[idx:]
-        q.clear()
-        q.extend(remaining)
+        self._abandon_traces(self.queue.slice(0, idx))
+        dropped = self.queue.drop_front(idx)
+        self._queue_changed()
         self.skip()
-        return len(dropped)
+        return dropped
 
     # ---------------- Playback controls ----------------
     def skip(self):
@@ -581,16 +3064,109 @@ class MusicPlayer:
         self.mark_activity()
         if self.voice and self.voice.is_paused():
             self.voice.resume()
+            if self._source_stale:
+                # Keep playing the old source until the rebuilt one is primed.
+                if self._source_refresh_task and not self._source_refresh_task.done():
+                    self._source_refresh_task.cancel()
+                self._source_refresh_task = asyncio.create_task(self._refresh_source_soon(delay=0))
             if self._paused_at is not None:
                 self._paused_total += time.monotonic() - self._paused_at
                 self._paused_at = None
 
     def set_volume(self, new_volume: float) -> float:
         self.volume = max(0.0, min(float(new_volume), 2.0))
-        if self.voice and self.voice.source and isinstance(self.voice.source, discord.PCMVolumeTransformer):
-            self.voice.source.volume = self.volume
+        if not self.voice or not self.voice.source:
+            return self.volume
+        if self._transition is not None and self._transition.has_next():
+            # The primed next track was built at the old volume.
+            self._transition.clear_next()
+            self._schedule_transition()
+        pcm = _find_volume_transformer(self.voice.source)
+        if pcm is not None:
+            pcm.volume = self.volume
+        elif self._current_resolved is not None:
+            # Opus sources bake volume into FFmpeg; rebuild the source at the current position.
+            self._source_stale = True
+            if not self.voice.is_paused():
+                if self._source_refresh_task and not self._source_refresh_task.done():
+                    self._source_refresh_task.cancel()
+                self._source_refresh_task = asyncio.create_task(self._refresh_source_soon())
         return self.volume
 
+    async def _refresh_source_soon(self, delay: float = 0.4):
+        # Debounced so a burst of Vol +/- clicks only respawns FFmpeg once.
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        if self.voice and self.voice.is_playing():
+            await self._refresh_source()
+
+    async def _refresh_source(self):
+        """Swap in a freshly built source for the current track, resuming at the elapsed position."""
+        self._source_stale = False
+        info = self._current_resolved
+        if info is None or not self.voice or not self.voice.source:
+            return
+        local = AUDIO_CACHE.lookup(info.id, count=False) if AUDIO_CACHE else None
+        start_at = self._elapsed_exact()
+
+        def build() -> Optional[PrimedSource]:
+            # Spawning FFmpeg and waiting for its first frame both block; keep them off the
+            # loop so the audio thread never sees an unprimed source.
+            primed = PrimedSource(make_audio_source(info, self.volume, start_at=start_at, local_path=local))
+            if not primed.prime():
+                primed.cleanup()
+                return None
+            return primed
+
+        fut = asyncio.ensure_future(asyncio.to_thread(build))
+        try:
+            new = await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            # A newer click superseded us; reap the FFmpeg process once it's spawned.
+            fut.add_done_callback(_cleanup_built_source)
+            raise
+        except Exception as e:
+            logger.warning("Failed to rebuild audio source: %s", e)
+            return
+        if new is None:
+            logger.warning("Rebuilt audio source produced no audio; keeping the old one")
+            return
+        if self._current_resolved is not info or not self.voice or not self.voice.source:
+            new.cleanup()  # track changed while priming
+            return
+
+        # Catch up on what played while FFmpeg was starting so the swap doesn't repeat audio.
+        lag = int((self._elapsed_exact() - start_at) * FRAMES_PER_SECOND)
+        if lag > 0:
+            skip = asyncio.ensure_future(asyncio.to_thread(new.skip, lag))
+            try:
+                await asyncio.shield(skip)
+            except asyncio.CancelledError:
+                _cleanup_when_done(skip, new)  # the thread is still reading from it
+                raise
+        if self._current_resolved is not info or not self.voice or not self.voice.source:
+            new.cleanup()
+            return
+
+        try:
+            if isinstance(self.voice.source, TransitionSource):
+                old = self.voice.source.replace_current(new)
+            else:
+                # VoiceClient.source swaps under the player's lock; the after-callback is kept.
+                old = self.voice.source
+                self.voice.source = new
+            self._playback_path = playback_path(info, self.volume, local=bool(local))
+        except Exception as e:
+            logger.warning("Failed to swap audio source: %s", e)
+            new.cleanup()
+            return
+        try:
+            old.cleanup()
+        except Exception:
+            pass
+
     def volume_up(self, step: float = VOLUME_STEP) -> float:
         return self.set_volume(self.volume + step)
 
@@ -598,14 +3174,18 @@ class MusicPlayer:
         return self.set_volume(self.volume - step)
 
     async def stop(self):
-        # Cancel disconnect watcher
-        if self._disconnect_watch_task and not self._disconnect_watch_task.done():
-            self._disconnect_watch_task.cancel()
-        self._disconnect_watch_task = None
-        self._empty_since = None
+        # Cancel idle / empty-channel deadlines
+        self._cancel_disconnect_timers()
         
         self.clear_queue()
+        self._cancel_prefetch()
+        self._cancel_transition()
+        self._abandon_traces((self.current,))  # no-op if its first frame already went out
+        self._transition = None
+        self._handover = None
         self.current = None
+        self._current_resolved = None
+        self._track_ended_at = None
 
         for t in list(self._bg_tasks):
             t.cancel()
@@ -614,6 +3194,7 @@ class MusicPlayer:
         await self._stop_nowplaying_updater()
 
         if self.voice and self.voice.is_connected():
+            LISTENERS.forget(self.voice.channel.id)
             await self.voice.disconnect()
         self.voice = None
 
@@ -627,14 +3208,23 @@ class MusicPlayer:
 
     # ---------------- Now playing embed ----------------
     def _elapsed_seconds(self) -> int:
+        return int(self._elapsed_exact())
+
+    def _elapsed_exact(self) -> float:
         if self._started_monotonic is None:
-            return 0
+            return 0.0
         now = time.monotonic()
         paused_extra = 0.0
         if self._paused_at is not None:
             paused_extra = now - self._paused_at
         elapsed = (now - self._started_monotonic) - (self._paused_total + paused_extra)
-        return max(0, int(elapsed))
+        return max(0.0, elapsed)
+
+    def _played_through(self) -> bool:
+        """True if the current track reached (nearly) its end rather than being skipped."""
+        if not self.current or not self.current.duration:
+            return False
+        return self._elapsed_seconds() >= self.current.duration - 3
 
     def _remaining_seconds(self) -> Optional[int]:
         if not self.current or self.current.duration is None:
@@ -642,7 +3232,8 @@ class MusicPlayer:
         return max(0, int(self.current.duration - self._elapsed_seconds()))
 
     def format_queue(self, max_items: int = 15) -> str:
-        items = self.queue_snapshot()
+        items = self.queue_snapshot(max_items)
+        total = len(self.queue)
         lines = []
         if self.current and self.current.title:
             lines.append(f"**Now:** {self.current.title}")
@@ -655,55 +3246,83 @@ class MusicPlayer:
             lines.append("**Queue:** (empty)")
         else:
             lines.append("**Queue:**")
-            for i, t in enumerate(items[:max_items], start=1):
+            for i, t in enumerate(items, start=1):
                 label = t.title or t.query
                 lines.append(f"{i}. {label}")
-            if len(items) > max_items:
-                lines.append(f"...and {len(items) - max_items} more")
+            if total > max_items:
+                lines.append(f"...and {total - max_items} more")
         return "\n".join(lines)
 
-    def nowplaying_embed(self) -> discord.Embed:
-        # Modernized embed layout (clean fields + thumbnail)
+    def _track_fragments(self, t: Track) -> NowPlayingFragments:
+        frag = self._fragments
+        if frag is None or self._fragments_track is not t or not frag.matches(t):
+            frag = self._fragments = NowPlayingFragments(t)
+            self._fragments_track = t
+        return frag
+
+    def _render_state(self) -> tuple:
+        """Every input of nowplaying_embed() and NowPlayingView; equal states render identically."""
+        view = self._view_state()
         if not self.current:
+            return (None, view, int(self.volume * 100))
+        return (
+            self._track_fragments(self.current),
+            view,
+            int(self.volume * 100),
+            *self._progress_state(),
+            self.queue.qsize(),
+        )
+
+    def _progress_state(self) -> Tuple[int, int, Optional[int]]:
+        """
+        (bar cell, shown elapsed, shown remaining). The panel clock advances one bar cell
+        (or PANEL_UPDATE_SECONDS, if longer) at a time, so a progress tick that wouldn't
+        move the bar renders the same state and its edit is skipped.
+        """
+        duration = self.current.duration if self.current else None
+        if duration is None:
+            return (0, 0, None)  # no bar or clock is shown
+        if duration <= 0:
+            return (0, 0, 0)
+        elapsed = self._elapsed_exact()
+        step = max(PANEL_UPDATE_SECONDS, duration / PROGRESS_WIDTH)
+        shown = min(int(duration), int(elapsed // step * step))
+        return (progress_cell(elapsed, duration), shown, max(0, int(duration - shown)))
+
+    def nowplaying_embed(self, state: Optional[tuple] = None) -> discord.Embed:
+        # Modernized embed layout (clean fields + thumbnail)
+        if state is None:
+            state = self._render_state()
+        if state[0] is None:
             embed = discord.Embed(
                 title="🎶 Music Panel",
                 description="Nothing is playing right now.\n\nUse **/play** to queue something.",
                 color=discord.Color.dark_grey(),
             )
-            embed.set_footer(text=f"Volume: {int(self.volume*100)}%")
+            embed.set_footer(text=f"Volume: {state[2]}%")
             return embed
 
-        t = self.current
-        title = t.title or "Resolving…"
-        artist = t.artist or "Unknown artist"
-        requester = t.requested_by
-        url = t.webpage_url or ""
-
-        dur = t.duration
-        elapsed = self._elapsed_seconds()
-        remaining = self._remaining_seconds()
-
-        state = "⏸️ Paused" if (self.voice and self.voice.is_paused()) else "▶️ Playing"
-        color = discord.Color.blurple() if state.startswith("▶️") else discord.Color.orange()
+        frag, view, volume, cell, elapsed, remaining, qsize = state
+        paused = view[0]
 
         embed = discord.Embed(
             title="🎶 Music Panel",
-            description=f"**[{title}]({url})**" if url else f"**{title}**",
-            color=color,
+            description=frag.description,
+            color=discord.Color.orange() if paused else discord.Color.blurple(),
         )
 
         # Thumbnail (if available from yt-dlp)
-        if getattr(t, "thumbnail", None):
-            embed.set_thumbnail(url=t.thumbnail)
+        if frag.thumbnail:
+            embed.set_thumbnail(url=frag.thumbnail)
 
-        embed.add_field(name="Artist", value=artist, inline=True)
-        embed.add_field(name="Requested by", value=requester, inline=True)
-        embed.add_field(name="Status", value=state, inline=True)
+        embed.add_field(name="Artist", value=frag.artist, inline=True)
+        embed.add_field(name="Requested by", value=frag.requester, inline=True)
+        embed.add_field(name="Status", value="⏸️ Paused" if paused else "▶️ Playing", inline=True)
 
-        if dur is not None:
-            bar = progress_bar(elapsed, dur, width=24)
+        if frag.duration is not None:
+            bar = progress_bars(PROGRESS_WIDTH)[cell]
             prog_lines = [
-                f"`{fmt_time(elapsed)} / {fmt_time(dur)}`",
+                f"`{fmt_time(elapsed)} / {frag.duration_text}`",
                 f"`{bar}`",
             ]
             if remaining is not None:
@@ -712,24 +3331,74 @@ class MusicPlayer:
         else:
             embed.add_field(name="Progress", value="⏳ Remaining: **unknown**", inline=False)
 
-        qsize = self.queue.qsize()
         embed.add_field(name="Up next", value=f"{qsize} track(s) in queue" if qsize else "—", inline=True)
-        embed.add_field(name="Volume", value=f"{int(self.volume*100)}%", inline=True)
+        embed.add_field(name="Volume", value=f"{volume}%", inline=True)
 
         embed.set_footer(text="Use the buttons below to control playback and manage the queue.")
         return embed
 
+    # ---------------- Panel rendering (diff-aware) ----------------
+    def _view_state(self) -> tuple:
+        """Everything NowPlayingView derives its button state from."""
+        return (
+            bool(self.voice and self.voice.is_paused()),
+            len(self.history) > 0,
+            self.current is None,
+            self.current is None and self.queue.qsize() == 0,
+        )
+
+    def _panel_view(self, view_state: tuple) -> "NowPlayingView":
+        """NowPlayingView for this button state; rebuilt only when the state changes."""
+        if self._view is None or self._view_key != view_state:
+            self._view = NowPlayingView(self)
+            self._view_key = view_state
+        return self._view
+
+    def _forget_stale_renders(self):
+        live = {m.id for m in (self._panel_message, self._nowplaying_message) if m is not None}
+        for mid in [mid for mid in self._rendered if mid not in live]:
+            del self._rendered[mid]
+
+    async def _send_ui_message(self) -> discord.Message:
+        state = self._render_state()
+        msg = await self.text_channel.send(embed=self.nowplaying_embed(state), view=self._panel_view(state[1]))
+        self._rendered[msg.id] = state
+        self._panel_posts += 1
+        return msg
+
+    async def _edit_ui_message(self, message: discord.Message) -> bool:
+        """Edit message to the current render, unless it already shows exactly that."""
+        state = self._render_state()
+        if self._rendered.get(message.id) == state:
+            self._edits_suppressed += 1
+            return False  # decided without building the embed
+        await message.edit(embed=self.nowplaying_embed(state), view=self._panel_view(state[1]))
+        self._rendered[message.id] = state
+        self._edit_times.append(time.monotonic())
+        self._edits_total += 1
+        return True
+
+    def panel_stats(self) -> dict:
+        cutoff = time.monotonic() - 60
+        return {
+            "edits": self._edits_total,
+            "edits_suppressed": self._edits_suppressed,
+            "edits_per_minute": sum(1 for t in self._edit_times if t >= cutoff),
+            "posts": self._panel_posts,
+            "track_changes_in_place": self._panel_reused,
+            "track_changes_reposted": self._panel_reposts,
+            "messages_since_panel": self._messages_since_panel,
+        }
+
     async def post_nowplaying_message(self):
         """Legacy: posts a one-off Now Playing message."""
         if not self.text_channel:
             return
         try:
-            self._nowplaying_message = await self.text_channel.send(
-                embed=self.nowplaying_embed(),
-                view=NowPlayingView(self),
-            )
+            self._nowplaying_message = await self._send_ui_message()
         except Exception:
             self._nowplaying_message = None
+        self._forget_stale_renders()
 
     async def ensure_panel_message(self) -> Optional[discord.Message]:
         """Ensure there is a Music Panel message; reuse existing if possible."""
@@ -737,22 +3406,20 @@ class MusicPlayer:
             return None
 
         if self._panel_message is not None:
-            try:
-                await self._panel_message.edit(embed=self.nowplaying_embed(), view=NowPlayingView(self))
-                return self._panel_message
-            except Exception:
-                self._panel_message = None
+            # Refreshing it goes through the scheduler; if it was deleted, that re-creates it.
+            PANEL_EDITS.request(self, self._panel_message, forced=True)
+            return self._panel_message
 
         # Create a new one (do NOT delete anything here)
         try:
-            self._panel_message = await self.text_channel.send(
-                embed=self.nowplaying_embed(),
-                view=NowPlayingView(self),
-            )
+            self._panel_message = await self._send_ui_message()
+            self._messages_since_panel = 0
             return self._panel_message
         except Exception:
             self._panel_message = None
             return None
+        finally:
+            self._forget_stale_renders()
 
     async def post_new_panel_message(self, delete_previous: bool = True) -> Optional[discord.Message]:
         """Post a fresh Music Panel message (optionally deleting the previous one)."""
@@ -766,30 +3433,42 @@ class MusicPlayer:
                 pass
 
         try:
-            self._panel_message = await self.text_channel.send(
-                embed=self.nowplaying_embed(),
-                view=NowPlayingView(self),
-            )
+            self._panel_message = await self._send_ui_message()
+            self._messages_since_panel = 0
             return self._panel_message
         except Exception:
             self._panel_message = None
             return None
-        if self._panel_message is not None:
-            try:
-                await self._panel_message.edit(embed=self.nowplaying_embed(), view=NowPlayingView(self))
-                return self._panel_message
-            except Exception:
-                self._panel_message = None
+        finally:
+            self._forget_stale_renders()
+
+    def panel_for_new_track(self):
+        """
+        Show a new track on the panel without blocking playback: edit it in place (one
+        REST call) while it's still near the bottom of the channel, and only delete and
+        repost once PANEL_REPOST_AFTER_MESSAGES messages have pushed it out of view.
+        """
+        if not self.text_channel:
+            return
+        panel = self._panel_message
+        if (
+            panel is not None
+            and panel.channel.id == getattr(self.text_channel, "id", None)
+            and self._messages_since_panel < PANEL_REPOST_AFTER_MESSAGES
+        ):
+            self._panel_reused += 1
+            PANEL_EDITS.request(self, panel, forced=True)
+            return
+        if self._panel_repost_task is not None and not self._panel_repost_task.done():
+            return  # a repost is already on its way and will show the current track
+        self._panel_reposts += 1
+        self._panel_repost_task = self.spawn_bg(self.post_new_panel_message(delete_previous=True))
 
-        try:
-            self._panel_message = await self.text_channel.send(
-                embed=self.nowplaying_embed(),
-                view=NowPlayingView(self),
-            )
-            return self._panel_message
-        except Exception:
-            self._panel_message = None
-            return None
+    def channel_message(self, message: discord.Message):
+        """on_message hook: count what's been posted below the panel."""
+        panel = self._panel_message
+        if panel is not None and message.channel.id == panel.channel.id and message.id != panel.id:
+            self._messages_since_panel += 1
 
     async def update_panel_message(self, force: bool = False):
         """Update the persistent panel message (preferred UI)."""
@@ -802,18 +3481,9 @@ class MusicPlayer:
             await self.ensure_panel_message()
             return
 
-        now = time.monotonic()
-        if not force and (now - self._last_np_edit) < self._np_interval:
+        if not force and (time.monotonic() - self._last_np_edit) < PANEL_UPDATE_SECONDS:
             return
-
-        try:
-            await self._panel_message.edit(embed=self.nowplaying_embed(), view=NowPlayingView(self))
-            self._last_np_edit = now
-            self._np_interval = max(1.0, self._np_interval * 0.9)
-        except discord.HTTPException:
-            self._np_interval = min(5.0, self._np_interval * 1.5)
-        except Exception:
-            pass
+        PANEL_EDITS.request(self, self._panel_message, forced=force)
 
     async def update_ui_message(self, force: bool = False):
         """Update whichever UI message is active (panel preferred, else legacy nowplaying)."""
@@ -828,47 +3498,57 @@ class MusicPlayer:
         if not self.current and not force:
             return
 
-        now = time.monotonic()
-        if not force and (now - self._last_np_edit) < self._np_interval:
+        if not force and (time.monotonic() - self._last_np_edit) < PANEL_UPDATE_SECONDS:
             return
-
-        try:
-            await self._nowplaying_message.edit(embed=self.nowplaying_embed(), view=NowPlayingView(self))
-            self._last_np_edit = now
-            self._np_interval = max(1.0, self._np_interval * 0.9)
-        except discord.HTTPException:
-            self._np_interval = min(5.0, self._np_interval * 1.5)
-        except Exception:
-            pass
+        PANEL_EDITS.request(self, self._nowplaying_message, forced=force)
 
     async def _start_nowplaying_updater(self):
         await self._stop_nowplaying_updater()
+        self._np_timer = TIMERS.call_later(PANEL_UPDATE_SECONDS, self._progress_tick)
 
-        async def loop():
-            try:
-                while True:
-                    await asyncio.sleep(0.5)
-                    if not self.voice or not self.current:
-                        return
-                    if not (self.voice.is_playing() or self.voice.is_paused()):
-                        return
-                    await self.update_ui_message()
-            except asyncio.CancelledError:
-                return
-
-        self._np_update_task = asyncio.create_task(loop())
+    def _progress_tick(self):
+        self._np_timer = None
+        if not self.voice or not self.current:
+            return
+        if not (self.voice.is_playing() or self.voice.is_paused()):
+            return
+        msg = self._panel_message if self._panel_message is not None else self._nowplaying_message
+        if msg is not None and self.text_channel is not None:
+            PANEL_EDITS.request(self, msg)
+        self._np_timer = TIMERS.call_later(PANEL_UPDATE_SECONDS, self._progress_tick)
 
     async def _stop_nowplaying_updater(self):
-        if self._np_update_task and not self._np_update_task.done():
-            self._np_update_task.cancel()
-        self._np_update_task = None
+        TIMERS.cancel(self._np_timer)
+        self._np_timer = None
+
+    def _take_handover(self) -> Optional[Tuple[NextUp, float]]:
+        """Claim a track the TransitionSource already switched to, dropping it from the queue."""
+        handover, self._handover = self._handover, None
+        if handover is None:
+            return None
+        track = handover[0].track
+        if self.queue.peek() is track:
+            self.queue.popleft()
+        else:
+            # If it was removed after it started it's already audible, so just let it play.
+            self.queue.remove(track)
+        return handover
 
     async def _player_loop(self):
         while True:
-            self.current = await self.queue.get()
-            if not self.voice or not self.voice.is_connected():
-                self.current = None
-                return
+            handover = self._take_handover()
+            if handover is not None:
+                self.current = handover[0].track
+            else:
+                self.current = await self.queue.get()
+                if not self.voice or not self.voice.is_connected():
+                    self._abandon_traces((self.current,))
+                    self.current = None
+                    return
+            trace = self.current.trace
+            if trace and handover is None:
+                trace.mark("queue_wait")
+            self._schedule_prefetch()
 
             self._track_done = asyncio.Event()
 
@@ -876,41 +3556,81 @@ class MusicPlayer:
             self._paused_at = None
             self._paused_total = 0.0
             self._last_np_edit = 0.0
-            self._np_interval = 1.0
 
             try:
-                info = await ytdlp_resolve(self.current.query)
-                self.current.title = self.current.title or (info.get("title") or "Unknown title")
-                self.current.webpage_url = info.get("webpage_url") or self.current.webpage_url or self.current.query
-                self.current.duration = info.get("duration") if self.current.duration is None else self.current.duration
-                self.current.artist = self.current.artist or _pick_artist_from_info(info)
-                self.current.thumbnail = getattr(self.current, "thumbnail", None) or info.get("thumbnail")
-
-                stream_url = info["url"]
-                source = make_audio_source(stream_url, self.volume)
-                self._started_monotonic = time.monotonic()
-
-                def _after_play(err: Optional[Exception]):
-                    if err:
-                        logger.error("Playback error: %s", err)
-                    if self._track_done:
-                        self.client.loop.call_soon_threadsafe(self._track_done.set)
-
-                self.voice.play(source, after=_after_play)
+                if handover is not None:
+                    nxt, started_at = handover
+                    info, local = nxt.info, nxt.local_path
+                    if AUDIO_CACHE and local:
+                        AUDIO_CACHE.lookup(info.id)  # count the hit
+                else:
+                    info = resolved_from_disk(self.current) or await resolve_track(self.current, self.guild_id)
+                    local = AUDIO_CACHE.lookup(info.id) if AUDIO_CACHE else None
+                    if trace:
+                        trace.mark("player_resolve")
+
+                self.current.title = self.current.title or (info.title or "Unknown title")
+                self.current.webpage_url = info.webpage_url or self.current.webpage_url or self.current.query
+                self.current.duration = info.duration if self.current.duration is None else self.current.duration
+                self.current.artist = self.current.artist or info.artist
+                self.current.thumbnail = getattr(self.current, "thumbnail", None) or info.thumbnail
+                if MATCH_INDEX is not None and self.current.match_hit is not None:
+                    MATCH_INDEX.count(self.current.match_hit)
+
+                self._current_resolved = info
+                self._playback_path = playback_path(info, self.volume, local=bool(local))
+                self._from_disk = bool(local)
+                self._source_stale = False
+
+                if handover is not None:
+                    # Already audible: the TransitionSource switched to it at frame granularity.
+                    self._started_monotonic = started_at
+                    self._track_ended_at = None
+                    if trace:
+                        # Resolve and FFmpeg spawn overlapped the previous track; the wait ends at the handover frame.
+                        trace.mark("queue_wait", at=started_at)
+                        TRACES.finish(trace)
+                else:
+                    source = make_audio_source(info, self.volume, local_path=local)
+                    self._started_monotonic = time.monotonic()
+                    if trace:
+                        trace.mark("ffmpeg_spawn")
+
+                    def _after_play(err: Optional[Exception]):
+                        if err:
+                            logger.error("Playback error: %s", err)
+                        if self._track_done:
+                            self.client.loop.call_soon_threadsafe(self._track_done.set)
+
+                    self._transition = TransitionSource(source, info.duration, self._track_ended_at, self._transition_event)
+                    self._track_ended_at = None
+                    self.voice.play(self._transition, after=_after_play)
+
                 self.mark_activity()
                 self._start_disconnect_watcher()
+                self._schedule_transition()
 
-                await self.post_new_panel_message(delete_previous=True)
+                self.panel_for_new_track()
                 await self._start_nowplaying_updater()
 
                 await self._track_done.wait()
+                if AUDIO_CACHE and not self._from_disk and self._played_through():
+                    AUDIO_CACHE.schedule_store(info)
+                # Only count the next start as a track-change gap if something was already waiting
+                # (a gapless handover measures itself).
+                if self._handover is None:
+                    self._track_ended_at = time.monotonic() if not self.queue.empty() else None
+                    self._cancel_transition()
                 await self._stop_nowplaying_updater()
 
                 if self.current:
                     self.history.append(self.current)
+                self._current_resolved = None
 
             except Exception as e:
                 logger.exception("Failed to play track: %s", e)
+                self._track_ended_at = None
+                TRACES.finish(trace, error=str(e))
                 await self._stop_nowplaying_updater()
 
     def status_dict(self) -> dict:
@@ -923,6 +3643,8 @@ class MusicPlayer:
                 "playing": self.voice.is_playing(),
                 "paused": self.voice.is_paused(),
                 "volume": self.volume,
+                "playback_path": self._playback_path,
+                "from_disk_cache": self._from_disk,
             }
 
         return {
@@ -945,7 +3667,10 @@ class MusicPlayer:
                 "remaining": self._remaining_seconds(),
             },
             "queue_len": self.queue.qsize(),
-            "queue_preview": [(t.title or t.query) for t in self.queue_snapshot()[:10]],
+            "track_gap": self.gap_stats(),
+            "panel": self.panel_stats(),
+            "queue_version": self.queue.version,
+            "queue_preview": [(t.title or t.query) for t in self.queue_snapshot(10)],
             "history_len": len(self.history),
         }
 
@@ -1240,24 +3965,159 @@ async def handle_status(request: web.Request):
         "uptime_sec": int(time.time() - STARTED_AT),
         "bot_user": None,
         "bot_id": None,
+        "resolver_cache": RESOLVE_CACHE.stats(),
+        "resolver_pool": RESOLVER_POOL.stats(),
+        "audio_cache": AUDIO_CACHE.stats() if AUDIO_CACHE else {"enabled": False},
+        "spotify_match_index": MATCH_INDEX.stats() if MATCH_INDEX else {"enabled": False},
+        "spotify_cache": SPOTIFY_CACHE.stats(),
+        "panel_edits": PANEL_EDITS.stats(),
+        "timers": TIMERS.stats(),
+        "guild_config": GUILD_CONFIG.stats(),
+        "logging": LOG_WRITER.stats(),
+        "voice_listeners": LISTENERS.stats(),
         "guilds": guilds,
     })
 
+LOG_TAIL_BLOCK = 64 * 1024
+LOG_READ_MAX_BYTES = 1_000_000  # per ?since= response
+LOG_FOLLOW_INTERVAL = 1.0
+
+def _read_log_tail(path: str, lines: int) -> Tuple[bytes, int]:
+    """Last `lines` lines of the log, read backwards block by block. Returns (data, end offset)."""
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        if lines <= 0:
+            return b"", end
+        pos = end
+        chunks = []
+        newlines = 0
+        while pos > 0 and newlines <= lines:
+            step = min(LOG_TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    return b"".join(data.splitlines(keepends=True)[-lines:]), end
+
+def _read_log_since(path: str, offset: int, limit: int = LOG_READ_MAX_BYTES) -> Tuple[bytes, int]:
+    """Complete lines appended after byte `offset`. Returns (data, offset to pass next time)."""
+    with open(path, "rb") as f:
+        if offset > os.fstat(f.fileno()).st_size:
+            offset = 0  # the log rotated since the client's last read
+        f.seek(offset)
+        data = f.read(limit)
+    cut = data.rfind(b"\n") + 1
+    if cut == 0:
+        # No complete line yet; unless a single line is longer than the limit, wait for the rest.
+        cut = len(data) if len(data) >= limit else 0
+    return data[:cut], offset + cut
+
+def _int_query(request: web.Request, name: str, default: int, minimum: int = 0) -> int:
+    """Integer query parameter; raises ValueError with a message fit for a 400 response."""
+    raw = request.query.get(name, "")
+    if raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}")
+    return value
+
+async def _follow_logs(request: web.Request, offset: Optional[int], tail: int) -> web.StreamResponse:
+    """tail -f over chunked HTTP: only the bytes appended since the last poll are read."""
+    resp = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8", "Cache-Control": "no-cache"})
+    resp.enable_chunked_encoding()
+    await resp.prepare(request)
+    # Headers are sent from here on, so every failure just ends the stream.
+    try:
+        if offset is None:
+            data, offset = await asyncio.to_thread(_read_log_tail, LOG_PATH, tail)
+            await resp.write(data)
+        while True:
+            # aiohttp doesn't cancel handlers on disconnect, and an idle log never fails a write.
+            transport = request.transport
+            if transport is None or transport.is_closing():
+                break
+            data, offset = await asyncio.to_thread(_read_log_since, LOG_PATH, offset)
+            if data:
+                await resp.write(data)
+            else:
+                await asyncio.sleep(LOG_FOLLOW_INTERVAL)
+    except OSError:
+        pass  # client went away, or the log file is gone
+    return resp
+
 async def handle_logs(request: web.Request):
+    """
+    GET /logs?tail=N          last N lines
+    GET /logs?since=OFFSET    lines appended after a byte offset
+    GET /logs?follow=1        stream new lines as they're written (combine with tail or since)
+    Plain responses carry the offset to resume from in X-Log-Offset.
+    """
     if not _authorized(request):
         return web.json_response({"error": "unauthorized"}, status=401)
-    tail = int(request.query.get("tail", "200"))
+    follow = request.query.get("follow", "").lower() in ("1", "true", "yes")
     try:
-        with open(LOG_PATH, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()[-tail:]
-        return web.Response(text="".join(lines), content_type="text/plain")
+        offset = _int_query(request, "since", 0) if request.query.get("since") else None
+        tail = _int_query(request, "tail", 50 if follow else 200)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    if follow:
+        return await _follow_logs(request, offset, tail)
+    try:
+        if offset is not None:
+            data, offset = await asyncio.to_thread(_read_log_since, LOG_PATH, offset)
+        else:
+            data, offset = await asyncio.to_thread(_read_log_tail, LOG_PATH, tail)
+        return web.Response(
+            text=data.decode("utf-8", errors="ignore"),
+            content_type="text/plain",
+            headers={"X-Log-Offset": str(offset)},
+        )
     except Exception as e:
         return web.json_response({"error": str(e)}, status=500)
 
+async def handle_metrics(request: web.Request):
+    if not _authorized(request):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    return web.Response(body=METRICS.render().encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+async def handle_loop(request: web.Request):
+    if not _authorized(request):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    try:
+        n = _int_query(request, "top", 10)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response({
+        "lag": LOOP_LAG.stats(),
+        "slow_callback_ms": SLOW_CALLBACK_MS,
+        "slow_callbacks_total": SLOW_CALLBACKS.total,
+        "window_sec": LOOP_PROFILE_WINDOW,
+        "top": SLOW_CALLBACKS.top(n),
+        "recent": SLOW_CALLBACKS.recent(n),
+    })
+
+async def handle_traces(request: web.Request):
+    if not _authorized(request):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    try:
+        n = _int_query(request, "top", 10)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response(TRACES.summary(n))
+
 async def start_control_server():
     app = web.Application()
     app.router.add_get("/status", handle_status)
     app.router.add_get("/logs", handle_logs)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/loop", handle_loop)
+    app.router.add_get("/traces", handle_traces)
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, CONTROL_HOST, CONTROL_PORT)
@@ -1275,6 +4135,8 @@ class SlashMusicClient(discord.Client):
 
     async def setup_hook(self):
         self.loop.create_task(start_control_server())
+        SLOW_CALLBACKS.install()
+        LOOP_LAG.start()
 
         if GUILD_ID:
             guild = discord.Object(id=GUILD_ID)
@@ -1328,6 +4190,31 @@ def queue_position_for_append(p: MusicPlayer) -> int:
 async def on_ready():
     logger.info("[%s] Logged in as %s (ID: %s)", INSTANCE_NAME, client.user, client.user.id)
 
+@client.event
+async def on_message(message: discord.Message):
+    if message.guild is None:
+        return
+    p = PLAYERS.get(message.guild.id)
+    if p is not None:
+        p.channel_message(message)
+
+@client.event
+async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+    if before.channel == after.channel:
+        return
+    LISTENERS.update(member, before.channel, after.channel)
+    if member.id == client.user.id:
+        if before.channel is not None:
+            LISTENERS.forget(before.channel.id)  # we were moved or disconnected; the new channel is seeded below
+        if (before.channel is None) != (after.channel is None):
+            M_VOICE_CONNECTIONS.inc(1 if after.channel is not None else -1)
+    p = PLAYERS.get(member.guild.id)
+    if p is None or p.voice is None:
+        return
+    ch = getattr(p.voice, "channel", None)
+    if ch is not None and (before.channel == ch or after.channel == ch):
+        p.listeners_changed()
+
 @client.event
 async def on_guild_join(guild: discord.Guild):
     logger.info("[%s] Joined guild: %s (%s)", INSTANCE_NAME, guild.name, guild.id)
@@ -1393,35 +4280,45 @@ async def play_cmd(interaction: discord.Interaction, query: str):
     if interaction.guild is None:
         await interaction.response.send_message("Use this in a server.", ephemeral=True)
         return
+    trace = PlayTrace(interaction.guild.id, query)
     await interaction.response.defer(thinking=True)
+    trace.mark("defer")
     p = get_player(interaction.guild.id)
     p.set_channel(interaction.channel)
     await p.ensure_voice(interaction)
+    trace.mark("voice_connect")
 
     if "open.spotify.com/" in query:
         async def enqueue_spotify_buffered():
             try:
-                gen = spotify_track_objects(query, interaction.user.mention)
+                gen = spotify_track_pages(query, interaction.user.mention)
 
-                first: Optional[Track] = None
-                async for t in gen:
-                    first = t
-                    break
+                first_page: list = []
+                async for page in gen:
+                    if page:
+                        first_page = page
+                        break
 
-                if first is None:
+                if not first_page:
                     await interaction.followup.send("⚠️ Spotify link had no playable tracks.")
                     return
 
-                pos = queue_position_for_append(p)
-                await p.add_track(first)
-                await interaction.followup.send(f"✅ Queued: **{first.title or 'Unknown'}** — Position **#{pos}**\nBuffering the rest…")
-
-                buffered = 1
-                async for t in gen:
-                    await p.add_track(t)
-                    buffered += 1
-
-                await interaction.followup.send(f"✅ Finished buffering. Total queued from Spotify: **{buffered}**")
+                trace.mark("spotify_first_page")
+                first_page[0].trace = trace
+                first_pos, last_pos = await p.add_tracks(first_page)
+                trace.mark("enqueue")
+                await interaction.followup.send(f"✅ Queued: **{first_page[0].title or 'Unknown'}** — Position **#{first_pos}**\nBuffering the rest…")
+
+                buffered = len(first_page)
+                async for page in gen:
+                    _, end = await p.add_tracks(page)
+                    if page:
+                        last_pos = end
+                        buffered += len(page)
+
+                await interaction.followup.send(
+                    f"✅ Finished buffering. Total queued from Spotify: **{buffered}** (positions **#{first_pos}–#{last_pos}**)"
+                )
             except Exception as e:
                 try:
                     await interaction.followup.send(f"⚠️ Spotify buffering failed:\n`{e}`")
@@ -1437,9 +4334,10 @@ async def play_cmd(interaction: discord.Interaction, query: str):
     url = None
     dur = None
     try:
-        title, artist, url, dur = await resolve_title_for_queue_display(query)
+        title, artist, url, dur = await resolve_title_for_queue_display(query, interaction.guild.id)
     except Exception:
         pass
+    trace.mark("resolve_display")
 
     pos = queue_position_for_append(p)
     await p.add_track(
@@ -1450,6 +4348,7 @@ async def play_cmd(interaction: discord.Interaction, query: str):
             artist=artist,
             webpage_url=url,
             duration=dur,
+            trace=trace,
         )
     )
     await interaction.followup.send(f"✅ Queued: **{title}** — Position **#{pos}**")
@@ -1487,7 +4386,7 @@ async def playnext_cmd(interaction: discord.Interaction, query: str):
     url = None
     dur = None
     try:
-        title, artist, url, dur = await resolve_title_for_queue_display(query)
+        title, artist, url, dur = await resolve_title_for_queue_display(query, interaction.guild.id)
     except Exception:
         pass
 
@@ -1628,6 +4527,27 @@ async def clear_cmd(interaction: discord.Interaction):
     n = p.clear_queue()
     await interaction.response.send_message(f"🧹 Cleared **{n}** queued track(s).")
 
+@tree.command(name="cachestats", description="Show cache hit ratios for this bot instance")
+async def cachestats_cmd(interaction: discord.Interaction):
+    def ratio(st: dict) -> str:
+        r = st.get("hit_ratio")
+        return f"{r * 100:.1f}%" if r is not None else "n/a"
+
+    rc = RESOLVE_CACHE.stats()
+    lines = [
+        f"📊 **Cache stats — {INSTANCE_NAME}**",
+        f"Resolver: **{ratio(rc)}** hit ratio ({rc['hits']} hits / {rc['misses']} misses, {rc['entries']} entries)",
+    ]
+    if AUDIO_CACHE:
+        ac = AUDIO_CACHE.stats()
+        lines.append(
+            f"Disk audio: **{ratio(ac)}** hit ratio ({ac['hits']} hits / {ac['misses']} misses, "
+            f"{ac['files']} files, {ac['bytes'] / 1e6:.0f}/{ac['max_bytes'] / 1e6:.0f} MB)"
+        )
+    else:
+        lines.append("Disk audio: disabled (set AUDIO_CACHE_DIR to enable)")
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
 @tree.command(name="stop", description="Stop playback, clear queue, and disconnect")
 async def stop_cmd(interaction: discord.Interaction):
     if interaction.guild is None:
@@ -0,0 +1,94 @@
+import sys
+import json
+
+import yt_dlp
+
+# ============================================================
+# yt-dlp extraction worker for RESOLVER_MODE=process
+#
+# bot.py starts one of these per resolver slot and talks to it over
+# stdin/stdout, one JSON object per line:
+#   -> {"id": 1, "query": "..."}
+#   <- {"id": 1, "ok": true, "info": {...}}  /  {"id": 1, "ok": false, "error": "..."}
+# Only the trimmed ResolvedTrack fields cross the pipe, never the full yt-dlp info.
+# ============================================================
+
+
+class ResolvedTrack:
+    """
+    Compact result of one extraction: only what Track, make_audio_source and
+    status_dict need. The full yt-dlp info dict never outlives extract_trimmed().
+    """
+
+    __slots__ = ("id", "title", "artist", "duration", "thumbnail", "webpage_url", "stream_url", "acodec")
+
+    def __init__(self, id=None, title=None, artist=None, duration=None, thumbnail=None, webpage_url=None, stream_url=None, acodec=None):
+        self.id = id
+        self.title = title
+        self.artist = artist
+        self.duration = duration
+        self.thumbnail = thumbnail
+        self.webpage_url = webpage_url
+        self.stream_url = stream_url
+        self.acodec = acodec  # e.g. "opus" for YouTube webm audio; lets playback skip re-encoding
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ResolvedTrack":
+        return cls(**{k: d.get(k) for k in cls.__slots__})
+
+
+def pick_artist(info: dict):
+    for key in ("artist", "creator", "uploader", "channel"):
+        val = info.get(key)
+        if isinstance(val, str) and val.strip():
+            return val.strip()
+    return None
+
+
+def extract_trimmed(ydl: yt_dlp.YoutubeDL, query_or_url: str) -> ResolvedTrack:
+    info = ydl.extract_info(query_or_url, download=False)
+    if "entries" in info:
+        info = info["entries"][0]
+    duration = info.get("duration")
+    return ResolvedTrack(
+        id=info.get("id"),
+        title=info.get("title"),
+        artist=pick_artist(info),
+        duration=int(duration) if duration is not None else None,
+        thumbnail=info.get("thumbnail"),
+        webpage_url=info.get("webpage_url"),
+        stream_url=info.get("url"),
+        acodec=info.get("acodec"),
+    )
+
+
+def main() -> None:
+    opts = json.loads(sys.argv[1]) if len(sys.argv) > 1 else {}
+
+    # Keep the protocol channel clean: anything yt-dlp prints goes to stderr.
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    ydl = yt_dlp.YoutubeDL(opts)
+    # Warm up: import the YouTube extractor now instead of on the first request.
+    ydl.get_info_extractor("Youtube")
+    out.write(json.dumps({"ready": True}) + "\n")
+    out.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        req = json.loads(line)
+        try:
+            resp = {"id": req.get("id"), "ok": True, "info": extract_trimmed(ydl, req["query"]).to_dict()}
+        except Exception as e:
+            resp = {"id": req.get("id"), "ok": False, "error": str(e)}
+        out.write(json.dumps(resp) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import ast
+import asyncio
+import os
+from collections import deque
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+BOT_PY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bot.py")
+
+MODULE_DEFS = ("fmt_time", "progress_bars", "progress_cell", "NowPlayingFragments")
+PLAYER_METHODS = (
+    "_elapsed_exact", "_track_fragments", "_view_state",
+    "_render_state", "_progress_state", "_edit_ui_message",
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def _lift(clock: Clock):
+    """The panel render path out of bot.py, without importing bot.py (which starts the bot)."""
+    with open(BOT_PY, encoding="utf-8") as f:
+        src = f.read()
+    tree = ast.parse(src)
+    lines = src.splitlines()
+
+    def segment(node) -> str:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        return "\n".join(lines[start - 1:node.end_lineno])
+
+    top = {n.name: n for n in tree.body if isinstance(n, (ast.FunctionDef, ast.ClassDef))}
+    player = next(n for n in tree.body if isinstance(n, ast.ClassDef) and n.name == "MusicPlayer")
+    methods = {n.name: n for n in player.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+
+    code = "from __future__ import annotations\n"
+    code += "PROGRESS_WIDTH = 24\n_PROGRESS_BARS = {}\n"
+    code += "\n\n".join(segment(top[name]) for name in MODULE_DEFS)
+    code += "\n\nclass Player:\n" + "\n\n".join(segment(methods[name]) for name in PLAYER_METHODS)
+    ns = {"time": clock, "PANEL_UPDATE_SECONDS": 1.0, "Optional": Optional, "Dict": Dict, "Tuple": Tuple}
+    exec(code, ns)
+    return ns
+
+
+class Message:
+    def __init__(self):
+        self.id = 1
+        self.edits = 0
+
+    async def edit(self, **kwargs) -> None:
+        self.edits += 1
+
+
+def _player(ns: dict, clock: Clock, duration: int):
+    p = ns["Player"]()
+    p.current = SimpleNamespace(title="Song", artist="Artist", requested_by="user", webpage_url=None,
+                                thumbnail=None, duration=duration)
+    p.voice = SimpleNamespace(is_paused=lambda: False)
+    p.history = []
+    p.queue = SimpleNamespace(qsize=lambda: 0)
+    p.volume = 1.0
+    p._started_monotonic = clock.now
+    p._paused_total = 0.0
+    p._paused_at = None
+    p._fragments = None
+    p._fragments_track = None
+    p._rendered = {}
+    p._edits_suppressed = 0
+    p._edits_total = 0
+    p._edit_times = deque()
+    p.nowplaying_embed = lambda state: state
+    p._panel_view = lambda view_state: None
+    return p
+
+
+def test_ticks_inside_one_bar_cell_make_one_edit():
+    clock = Clock()
+    ns = _lift(clock)
+    p = _player(ns, clock, duration=240)  # 10 s per bar cell
+    msg = Message()
+
+    async def ticks():
+        clock.now += 11.0  # cell 1
+        assert await p._edit_ui_message(msg)
+        clock.now += 1.0
+        assert not await p._edit_ui_message(msg)  # same cell: suppressed
+        clock.now += 5.0
+        assert not await p._edit_ui_message(msg)
+        clock.now += 5.0  # 22 s: cell 2
+        assert await p._edit_ui_message(msg)
+
+    asyncio.run(ticks())
+    assert msg.edits == 2
+    assert p._edits_suppressed == 2
+
+
+def test_shown_clock_matches_the_bar():
+    clock = Clock()
+    ns = _lift(clock)
+    p = _player(ns, clock, duration=240)
+    clock.now += 27.5
+    cell, shown, remaining = p._progress_state()
+    assert (cell, shown, remaining) == (2, 20, 220)
+
+
+def test_short_tracks_still_tick_every_update():
+    clock = Clock()
+    ns = _lift(clock)
+    p = _player(ns, clock, duration=12)  # cells shorter than PANEL_UPDATE_SECONDS
+    states = []
+    for _ in range(3):
+        clock.now += 1.0
+        states.append(p._render_state())
+    assert len(set(states)) == 3
+
+
+def test_unknown_duration_never_changes_state():
+    clock = Clock()
+    ns = _lift(clock)
+    p = _player(ns, clock, duration=None)
+    first = p._render_state()
+    clock.now += 30.0
+    assert p._render_state() == first